@@ -1,10 +1,12 @@
+import hmac
 import time
+from typing import Optional
 from app import config
 from app.utils.auth import get_public_keys
 from jose import jwk, jwt
 from jose.utils import base64url_decode
 from jose.exceptions import JWTError
-from fastapi import HTTPException, status, Request
+from fastapi import Header, HTTPException, status, Request
 import logging
 from app.models.users import User
 from pydantic import ValidationError
@@ -132,3 +134,24 @@ async def get_current_user(request: Request) -> User:
 
     logger.info("User authenticated successfully")
     return user
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Guards administrative endpoints with the shared `ADMIN_API_TOKEN`, sent in
+    the `X-Admin-Token` header. Admin endpoints are disabled when it is unset.
+    """
+    if not config.ADMIN_API_TOKEN:
+        logger.warning("Admin endpoint called but ADMIN_API_TOKEN is not set.")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin API disabled",
+        )
+    if not x_admin_token or not hmac.compare_digest(
+        x_admin_token.encode("utf-8"), config.ADMIN_API_TOKEN.encode("utf-8")
+    ):
+        logger.warning("Invalid admin token.")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin token",
+        )
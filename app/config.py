@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 import logging
 
@@ -10,8 +11,52 @@ COGNITO_APP_CLIENT_SECRET = os.getenv("COGNITO_APP_CLIENT_SECRET")
 COGNITO_KEYS_URL = f"https://cognito-idp.us-east-1.amazonaws.com/{COGNITO_USER_POOL_ID}/.well-known/jwks.json"
 COGNITO_ISSUER = f"https://cognito-idp.us-east-1.amazonaws.com/{COGNITO_USER_POOL_ID}"
 DYNAMO_MESSAGES_TABLE = os.getenv("DYNAMO_MESSAGES_TABLE")
+DYNAMO_CONVERSATIONS_TABLE = os.getenv("DYNAMO_CONVERSATIONS_TABLE")
+DYNAMO_USER_STATS_TABLE = os.getenv("DYNAMO_USER_STATS_TABLE")
 CORS_ALLOWED_DOMAIN = os.getenv("CORS_ALLOWED_DOMAIN")
 ENV = os.getenv("ENV", "develop")
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
+WARM_UP_TIMEOUT_SECONDS = float(os.getenv("WARM_UP_TIMEOUT_SECONDS", "5"))
+READINESS_PROBE_INTERVAL_SECONDS = float(
+    os.getenv("READINESS_PROBE_INTERVAL_SECONDS", "10")
+)
+READINESS_PROBE_TIMEOUT_SECONDS = float(
+    os.getenv("READINESS_PROBE_TIMEOUT_SECONDS", "2")
+)
+JWKS_REFRESH_SECONDS = float(os.getenv("JWKS_REFRESH_SECONDS", "3600"))
+EVENTS_REDIS_URL = os.getenv("EVENTS_REDIS_URL")
+EVENTS_MAX_PENDING = int(os.getenv("EVENTS_MAX_PENDING", "100"))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+CONTEXT_WINDOW_TURNS = int(os.getenv("CONTEXT_WINDOW_TURNS", "10"))
+CONTEXT_MEMORY_BUDGET_BYTES = int(
+    os.getenv("CONTEXT_MEMORY_BUDGET_BYTES", str(64 * 1024 * 1024))
+)
+CONTEXT_MAX_AGE_SECONDS = float(os.getenv("CONTEXT_MAX_AGE_SECONDS", "300"))
+MESSAGES_BATCH_DELETE_MAX_IDS = int(os.getenv("MESSAGES_BATCH_DELETE_MAX_IDS", "100"))
+DYNAMO_BATCH_CONCURRENCY = int(os.getenv("DYNAMO_BATCH_CONCURRENCY", "4"))
+USER_STATS_CACHE_SECONDS = float(os.getenv("USER_STATS_CACHE_SECONDS", "5"))
+BULK_REGISTER_CONCURRENCY = int(os.getenv("BULK_REGISTER_CONCURRENCY", "8"))
+MESSAGE_RETENTION_DAYS = int(os.getenv("MESSAGE_RETENTION_DAYS", "0"))
+
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_ALLOW_HEADER = os.getenv("PROFILING_ALLOW_HEADER", "false").lower() == "true"
+PROFILES_DIR = os.getenv(
+    "PROFILES_DIR", os.path.join(tempfile.gettempdir(), "app-profiles")
+)
+PROFILES_MAX_FILES = int(os.getenv("PROFILES_MAX_FILES", "100"))
+PROFILING_MAX_SECONDS = float(os.getenv("PROFILING_MAX_SECONDS", "30"))
+
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0")) or os.cpu_count() or 1
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+SERVER_KEEP_ALIVE_SECONDS = int(os.getenv("SERVER_KEEP_ALIVE_SECONDS", "5"))
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "0")) or None
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "0"))
+SERVER_GRACEFUL_SHUTDOWN_SECONDS = float(
+    os.getenv("SERVER_GRACEFUL_SHUTDOWN_SECONDS", "20")
+)
+SERVER_PRELOAD = os.getenv("SERVER_PRELOAD", "true").lower() == "true"
 
 required_vars = [
     "COGNITO_USER_POOL_ID",
@@ -20,11 +65,21 @@ required_vars = [
     "COGNITO_KEYS_URL",
     "COGNITO_ISSUER",
     "DYNAMO_MESSAGES_TABLE",
+    "DYNAMO_CONVERSATIONS_TABLE",
+    "DYNAMO_USER_STATS_TABLE",
     "CORS_ALLOWED_DOMAIN",
     "ENV",
 ]
 
-for var in required_vars:
-    if not globals()[var]:
-        logging.critical(f"Environment variable {var} not set.")
-        raise EnvironmentError(f"Environment variable {var} not set.")
+
+def validate():
+    """
+    Ensures every required environment variable is set.
+
+    Called from the application lifespan so that importing the app (tests,
+    tooling, the server supervisor) does not depend on the environment.
+    """
+    for var in required_vars:
+        if not globals()[var]:
+            logging.critical(f"Environment variable {var} not set.")
+            raise EnvironmentError(f"Environment variable {var} not set.")
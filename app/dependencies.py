@@ -0,0 +1,140 @@
+import functools
+import logging
+from fastapi import Request
+from app import config
+from app.utils.context import ContextStore
+from app.utils.events import EventHub, InMemoryBroker, RedisBroker
+from app.utils.health import (
+    ReadinessMonitor,
+    probe_cognito,
+    probe_dynamodb,
+    probe_jwks,
+)
+from app.utils.stats import UserStatsStore
+
+logger = logging.getLogger("app.dependencies")
+
+
+def create_dynamodb_resource():
+    """
+    Builds the DynamoDB service resource shared by every table.
+
+    boto3 is imported here rather than at module level so importing the
+    application stays cheap; the resource is built once per process during
+    the application lifespan.
+    """
+    import boto3
+
+    return boto3.resource("dynamodb")
+
+
+def create_messages_table(dynamodb):
+    return dynamodb.Table(config.DYNAMO_MESSAGES_TABLE)
+
+
+def create_conversations_table(dynamodb):
+    return dynamodb.Table(config.DYNAMO_CONVERSATIONS_TABLE)
+
+
+def create_cognito_client():
+    """
+    Builds the Cognito Identity Provider client, once per process.
+    """
+    import boto3
+
+    return boto3.client("cognito-idp")
+
+
+def create_user_stats_store(dynamodb):
+    return UserStatsStore(
+        dynamodb.Table(config.DYNAMO_USER_STATS_TABLE),
+        cache_seconds=config.USER_STATS_CACHE_SECONDS,
+    )
+
+
+def create_context_store():
+    return ContextStore(
+        max_turns=config.CONTEXT_WINDOW_TURNS,
+        max_bytes=config.CONTEXT_MEMORY_BUDGET_BYTES,
+        max_age=config.CONTEXT_MAX_AGE_SECONDS,
+    )
+
+
+def create_event_broker():
+    """
+    Redis pub/sub when `EVENTS_REDIS_URL` is set, so every worker and instance
+    sees the events; in-process delivery otherwise.
+    """
+    if config.EVENTS_REDIS_URL:
+        return RedisBroker(config.EVENTS_REDIS_URL)
+    return InMemoryBroker()
+
+
+def create_event_hub():
+    return EventHub(create_event_broker(), max_pending=config.EVENTS_MAX_PENDING)
+
+
+def get_messages_table(request: Request):
+    state = request.app.state
+    if getattr(state, "messages_table", None) is None:
+        # Only reached when the app is served without running its lifespan.
+        state.messages_table = create_messages_table(create_dynamodb_resource())
+    return state.messages_table
+
+
+def get_conversations_table(request: Request):
+    state = request.app.state
+    if getattr(state, "conversations_table", None) is None:
+        state.conversations_table = create_conversations_table(
+            create_dynamodb_resource()
+        )
+    return state.conversations_table
+
+
+def get_context_store(request: Request):
+    state = request.app.state
+    if getattr(state, "context_store", None) is None:
+        state.context_store = create_context_store()
+    return state.context_store
+
+
+def get_user_stats_store(request: Request):
+    state = request.app.state
+    if getattr(state, "user_stats_store", None) is None:
+        state.user_stats_store = create_user_stats_store(create_dynamodb_resource())
+    return state.user_stats_store
+
+
+async def get_event_hub(request: Request):
+    state = request.app.state
+    if getattr(state, "event_hub", None) is None:
+        state.event_hub = create_event_hub()
+        await state.event_hub.start()
+    return state.event_hub
+
+
+def get_profiler(request: Request):
+    return request.app.state.profiler
+
+
+def get_cognito_client(request: Request):
+    state = request.app.state
+    if getattr(state, "cognito_client", None) is None:
+        state.cognito_client = create_cognito_client()
+    return state.cognito_client
+
+
+def create_readiness_monitor(app_state):
+    return ReadinessMonitor(
+        {
+            "jwks": functools.partial(probe_jwks, config.JWKS_REFRESH_SECONDS),
+            "dynamodb": functools.partial(probe_dynamodb, app_state.messages_table),
+            "cognito": functools.partial(probe_cognito, app_state.cognito_client),
+        },
+        interval=config.READINESS_PROBE_INTERVAL_SECONDS,
+        timeout=config.READINESS_PROBE_TIMEOUT_SECONDS,
+    )
+
+
+def get_readiness_monitor(request: Request):
+    return getattr(request.app.state, "readiness", None)
@@ -0,0 +1,114 @@
+"""
+Rebuilds the per-user message counters from the messages table.
+
+Scans the messages table once, projecting only `id_user`, `is_bot` and
+`timestamp`, aggregates the counters in memory and overwrites each user's row
+of the stats table. Rows of users with no message left (all expired or
+archived) are then zeroed. Reads are throttled to `--rate` items per second.
+
+Counter updates made by live traffic while the scan runs may be overwritten,
+so run it when traffic is low.
+
+Usage:
+    python -m app.jobs.backfill_stats [--rate 500] [--page-size 1000]
+"""
+
+import argparse
+import logging
+from typing import Dict
+
+from app import config
+from app.dependencies import create_dynamodb_resource, create_messages_table
+from app.utils.ratelimit import RateLimiter
+
+logger = logging.getLogger("app.jobs.backfill_stats")
+
+
+def aggregate(messages_table, page_size: int, limiter: RateLimiter) -> Dict[str, dict]:
+    """
+    Computes the counters of every user in one streaming scan.
+
+    Returns:
+        Dict[str, dict]: Stats table rows, indexed by user.
+    """
+    stats = {}
+    scan_kwargs = {
+        "ProjectionExpression": "id_user, is_bot, #ts",
+        "ExpressionAttributeNames": {"#ts": "timestamp"},
+        "Limit": page_size,
+    }
+    while True:
+        limiter.acquire(page_size)
+        response = messages_table.scan(**scan_kwargs)
+        for item in response.get("Items", []):
+            row = stats.setdefault(
+                item["id_user"],
+                {
+                    "id_user": item["id_user"],
+                    "user_messages": 0,
+                    "bot_messages": 0,
+                    "last_activity": "",
+                },
+            )
+            row["bot_messages" if item.get("is_bot") else "user_messages"] += 1
+            row["last_activity"] = max(row["last_activity"], item["timestamp"])
+        if "LastEvaluatedKey" not in response:
+            return stats
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def write_stats(
+    stats_table, stats: Dict[str, dict], page_size: int, limiter: RateLimiter
+) -> int:
+    """
+    Overwrites the rows of `stats`, then zeroes the counters of every other
+    user of the stats table, keeping their `last_activity`.
+
+    Returns:
+        int: Number of rows zeroed.
+    """
+    zeroed = 0
+    scan_kwargs = {"ProjectionExpression": "id_user, last_activity", "Limit": page_size}
+    with stats_table.batch_writer() as batch:
+        for row in stats.values():
+            batch.put_item(Item=row)
+        while True:
+            limiter.acquire(page_size)
+            response = stats_table.scan(**scan_kwargs)
+            for item in response.get("Items", []):
+                if item["id_user"] in stats:
+                    continue
+                batch.put_item(Item={**item, "user_messages": 0, "bot_messages": 0})
+                zeroed += 1
+            if "LastEvaluatedKey" not in response:
+                return zeroed
+            scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--rate", type=float, default=500, help="Max items scanned per second."
+    )
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    config.validate()
+
+    dynamodb = create_dynamodb_resource()
+    limiter = RateLimiter(args.rate)
+    stats = aggregate(create_messages_table(dynamodb), args.page_size, limiter)
+    zeroed = write_stats(
+        dynamodb.Table(config.DYNAMO_USER_STATS_TABLE), stats, args.page_size, limiter
+    )
+    logger.info(
+        f"Rebuilt message stats of {len(stats)} users, zeroed {zeroed} without messages"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Creates Cognito users in bulk from a CSV or NDJSON file.
+
+CSV files need an `email,password` header; any other extension is read as
+NDJSON. One result per line is appended to `--results` as it completes. When
+the results file already exists, users recorded there as `created` or
+`exists` are skipped, so an interrupted import resumes where it stopped.
+
+Usage:
+    python -m app.jobs.bulk_register users.csv --results results.ndjson \\
+        [--concurrency 8]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+from collections import Counter
+
+from app import config
+from app.dependencies import create_cognito_client
+from app.utils.provisioning import parse_records, provision_users
+
+logger = logging.getLogger("app.jobs.bulk_register")
+
+DONE_STATUSES = {"created", "exists"}
+
+
+def load_done_emails(results_path: str) -> set:
+    if not os.path.exists(results_path):
+        return set()
+    done = set()
+    with open(results_path) as f:
+        for line in f:
+            if line.strip():
+                result = json.loads(line)
+                if result["status"] in DONE_STATUSES:
+                    done.add(result["email"])
+    return done
+
+
+async def run(
+    cognito_client, input_path: str, results_path: str, concurrency: int
+) -> Counter:
+    fmt = "csv" if input_path.lower().endswith(".csv") else "ndjson"
+    skip_emails = load_done_emails(results_path)
+    if skip_emails:
+        logger.info(f"Resuming: {len(skip_emails)} users already provisioned")
+
+    statuses = Counter()
+    with open(input_path, encoding="utf-8") as source, open(
+        results_path, "a"
+    ) as results:
+        async for result in provision_users(
+            cognito_client,
+            parse_records(source, fmt),
+            concurrency,
+            skip_emails=skip_emails,
+        ):
+            results.write(json.dumps(result) + "\n")
+            results.flush()
+            statuses[result["status"]] += 1
+    return statuses
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("input", help="CSV or NDJSON file of users.")
+    parser.add_argument("--results", required=True, help="NDJSON results file.")
+    parser.add_argument(
+        "--concurrency", type=int, default=config.BULK_REGISTER_CONCURRENCY
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    config.validate()
+
+    statuses = asyncio.run(
+        run(create_cognito_client(), args.input, args.results, args.concurrency)
+    )
+    logger.info(f"Bulk registration finished: {dict(statuses)}")
+
+
+if __name__ == "__main__":
+    main()
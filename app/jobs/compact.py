@@ -0,0 +1,248 @@
+"""
+Archives and removes old messages.
+
+For every user, streams the messages older than the cutoff (oldest first) from
+the `id_user-timestamp-index`, writes each page to a gzip-compressed NDJSON
+archive file, deletes the page with batch writes and takes it off the user's
+message stats. Progress is recorded
+in a state file so an interrupted run can be resumed, and all table traffic is
+throttled to `--rate` items per second to leave capacity to live traffic.
+
+Usage:
+    python -m app.jobs.compact --older-than-days 180 --archive-dir ./archive \\
+        [--user SUB ...] [--rate 50] [--page-size 100] [--state-file FILE]
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Iterable, Iterator, List, Optional
+
+from app import config
+from app.utils.ratelimit import RateLimiter
+from app.dependencies import (
+    create_cognito_client,
+    create_dynamodb_resource,
+    create_messages_table,
+    create_user_stats_store,
+)
+
+logger = logging.getLogger("app.jobs.compact")
+
+
+class CompactionState:
+    """
+    Resumable progress of a compaction run, persisted as JSON.
+    """
+
+    def __init__(self, path: Optional[str], cutoff: str):
+        self.path = path
+        self.cutoff = cutoff
+        self.completed_users = set()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            # Resuming keeps the cutoff of the interrupted run so every user is
+            # compacted against the same point in time.
+            self.cutoff = saved["cutoff"]
+            self.completed_users = set(saved["completed_users"])
+
+    def mark_completed(self, id_user: str) -> None:
+        self.completed_users.add(id_user)
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "cutoff": self.cutoff,
+                    "completed_users": sorted(self.completed_users),
+                },
+                f,
+            )
+        os.replace(tmp_path, self.path)
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _archive_name(first_item: dict) -> str:
+    # Named after the first message of the page, so re-archiving a page after
+    # an interruption overwrites the same file instead of duplicating it.
+    timestamp = re.sub(r"[^0-9T]", "", first_item["timestamp"])
+    return f"{timestamp}-{first_item['id_message']}.ndjson.gz"
+
+
+def write_archive(archive_dir: str, id_user: str, items: List[dict]) -> str:
+    """
+    Writes one page of messages to a compressed NDJSON file, atomically.
+
+    Returns:
+        str: Path of the archive file.
+    """
+    user_dir = os.path.join(archive_dir, id_user)
+    os.makedirs(user_dir, exist_ok=True)
+    path = os.path.join(user_dir, _archive_name(items[0]))
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for item in items:
+            f.write(json.dumps(item, default=_json_default) + "\n")
+    with open(tmp_path, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+def iter_old_message_pages(
+    messages_table, id_user: str, cutoff: str, page_size: int, limiter: RateLimiter
+) -> Iterator[List[dict]]:
+    query_kwargs = {
+        "IndexName": "id_user-timestamp-index",
+        "KeyConditionExpression": "id_user = :id_user AND #ts < :cutoff",
+        "ExpressionAttributeNames": {"#ts": "timestamp"},
+        "ExpressionAttributeValues": {":id_user": id_user, ":cutoff": cutoff},
+        "ScanIndexForward": True,
+        "Limit": page_size,
+    }
+    while True:
+        limiter.acquire(page_size)
+        response = messages_table.query(**query_kwargs)
+        items = response.get("Items", [])
+        if items:
+            yield items
+        if "LastEvaluatedKey" not in response:
+            return
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def compact_user(
+    messages_table,
+    id_user: str,
+    cutoff: str,
+    archive_dir: str,
+    page_size: int,
+    limiter: RateLimiter,
+    user_stats_store=None,
+) -> int:
+    """
+    Archives and deletes the user's messages older than `cutoff`, and takes
+    them off the user's message stats.
+
+    Returns:
+        int: Number of messages archived and deleted.
+    """
+    compacted = 0
+    for items in iter_old_message_pages(
+        messages_table, id_user, cutoff, page_size, limiter
+    ):
+        path = write_archive(archive_dir, id_user, items)
+        limiter.acquire(len(items))
+        with messages_table.batch_writer() as batch:
+            for item in items:
+                batch.delete_item(
+                    Key={"id_message": item["id_message"], "id_user": item["id_user"]}
+                )
+        if user_stats_store is not None:
+            bot_messages = sum(1 for item in items if item.get("is_bot", False))
+            user_stats_store.record(
+                id_user,
+                user_delta=-(len(items) - bot_messages),
+                bot_delta=-bot_messages,
+            )
+        compacted += len(items)
+        logger.info(f"Archived {len(items)} messages of user {id_user} to {path}")
+    return compacted
+
+
+def iter_user_ids(cognito_client) -> Iterator[str]:
+    paginator = cognito_client.get_paginator("list_users")
+    for page in paginator.paginate(
+        UserPoolId=config.COGNITO_USER_POOL_ID, AttributesToGet=["sub"]
+    ):
+        for user in page.get("Users", []):
+            for attribute in user.get("Attributes", []):
+                if attribute["Name"] == "sub":
+                    yield attribute["Value"]
+
+
+def run(
+    messages_table,
+    user_ids: Iterable[str],
+    state: CompactionState,
+    archive_dir: str,
+    page_size: int,
+    limiter: RateLimiter,
+    user_stats_store=None,
+) -> int:
+    total = 0
+    for id_user in user_ids:
+        if id_user in state.completed_users:
+            continue
+        total += compact_user(
+            messages_table,
+            id_user,
+            state.cutoff,
+            archive_dir,
+            page_size,
+            limiter,
+            user_stats_store=user_stats_store,
+        )
+        state.mark_completed(id_user)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--older-than-days", type=int, required=True)
+    parser.add_argument("--archive-dir", required=True)
+    parser.add_argument(
+        "--user",
+        action="append",
+        dest="users",
+        help="Compact only this user (Cognito sub); repeatable. "
+        "Defaults to every user of the pool.",
+    )
+    parser.add_argument(
+        "--rate", type=float, default=50, help="Max items read/deleted per second."
+    )
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument(
+        "--state-file", help="Progress file; an existing one resumes the run."
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    config.validate()
+
+    cutoff = (datetime.utcnow() - timedelta(days=args.older_than_days)).isoformat()
+    state = CompactionState(args.state_file, cutoff)
+    dynamodb = create_dynamodb_resource()
+    messages_table = create_messages_table(dynamodb)
+    user_ids = args.users or iter_user_ids(create_cognito_client())
+
+    logger.info(f"Compacting messages older than {state.cutoff}")
+    total = run(
+        messages_table,
+        user_ids,
+        state,
+        args.archive_dir,
+        args.page_size,
+        RateLimiter(args.rate),
+        user_stats_store=create_user_stats_store(dynamodb),
+    )
+    logger.info(f"Compaction finished: {total} messages archived")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,25 @@
+import asyncio
 import logging
+import signal
+import threading
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app import config
+from app.responses import ORJSONResponse
+from app.profiling import ProfilingMiddleware, create_profiler
+from app.dependencies import (
+    create_dynamodb_resource,
+    create_messages_table,
+    create_conversations_table,
+    create_cognito_client,
+    create_context_store,
+    create_user_stats_store,
+    create_readiness_monitor,
+    create_event_hub,
+)
 
 
-from app.routers import health, users, messages
+from app.routers import health, users, messages, conversations, debug
 
 logging.basicConfig(
     level=logging.INFO,
@@ -15,13 +30,56 @@ logging.basicConfig(
 logger = logging.getLogger("app.main")
 
 
+def _close_streams_on_exit_signal(event_hub) -> None:
+    """
+    Chains the server's SIGINT/SIGTERM handlers to close the event hub.
+
+    uvicorn waits for open connections to finish before it runs the lifespan
+    shutdown, and message streams never finish on their own, so they have to
+    be ended as soon as the exit signal arrives rather than from the lifespan.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(signum)
+        if not callable(previous):
+            continue
+
+        def handler(signum, frame, previous=previous):
+            loop.call_soon_threadsafe(event_hub.close)
+            previous(signum, frame)
+
+        signal.signal(signum, handler)
+
+
 async def lifespan(app: FastAPI):
     logger.info("Application startup")
+    config.validate()
+    dynamodb = create_dynamodb_resource()
+    app.state.messages_table = create_messages_table(dynamodb)
+    app.state.conversations_table = create_conversations_table(dynamodb)
+    app.state.user_stats_store = create_user_stats_store(dynamodb)
+    app.state.cognito_client = create_cognito_client()
+    app.state.context_store = create_context_store()
+    app.state.event_hub = create_event_hub()
+    await app.state.event_hub.start()
+    app.state.event_hub.add_listener(app.state.context_store.apply_events)
+    _close_streams_on_exit_signal(app.state.event_hub)
+    # The first probe round doubles as warm-up: it fetches the JWKS and opens
+    # the DynamoDB and Cognito connections before requests are accepted.
+    app.state.readiness = create_readiness_monitor(app.state)
+    await app.state.readiness.run_once(timeout=config.WARM_UP_TIMEOUT_SECONDS)
+    app.state.readiness.start()
+    logger.info("Application ready")
     yield
+    await app.state.readiness.stop()
+    await app.state.event_hub.stop()
     logger.info("Application shutdown")
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+app.state.profiler = create_profiler()
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,7 +88,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ProfilingMiddleware, profiler=app.state.profiler)
 
 app.include_router(health.router)
 app.include_router(users.router)
 app.include_router(messages.router)
+app.include_router(conversations.router)
+app.include_router(debug.router)
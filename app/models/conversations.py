@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class ConversationCreate(BaseModel):
+    title: Optional[str] = None
+
+
+class ConversationItem(BaseModel):
+    id_conversation: str
+    id_user: str
+    title: Optional[str] = None
+    created_at: str
+    updated_at: str
+    last_message: Optional[str] = None
+    last_message_at: Optional[str] = None
+    message_count: int = 0
+
+
+class ConversationList(BaseModel):
+    conversations: List[ConversationItem]
+
+
+class DeleteConversationResponse(BaseModel):
+    id_conversation: str
+    status: str
+    deleted_messages: int
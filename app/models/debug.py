@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class ProfilingSettings(BaseModel):
+    sample_rate: float = Field(..., ge=0, le=1)
+    allow_header: bool
+
+
+class ProfilingSettingsUpdate(BaseModel):
+    sample_rate: Optional[float] = Field(None, ge=0, le=1)
+    allow_header: Optional[bool] = None
+
+
+class ProfileItem(BaseModel):
+    name: str
+    size: int
+    created_at: str
+
+
+class ProfileList(BaseModel):
+    profiles: List[ProfileItem]
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Dict, Optional
+
+
+class ProbeStatus(BaseModel):
+    ok: bool
+    latency_ms: Optional[float] = None
+    age_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ReadinessStatus(BaseModel):
+    status: str
+    checks: Dict[str, ProbeStatus]
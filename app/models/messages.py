@@ -1,6 +1,5 @@
-from pydantic import BaseModel
-from typing import List
-from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 
 class MessageTableItem(BaseModel):
@@ -9,11 +8,50 @@ class MessageTableItem(BaseModel):
     content: str
     timestamp: str
     is_bot: bool
+    id_conversation: Optional[str] = None
 
 
 class MessageTableList(BaseModel):
-    messages: List
+    messages: List[MessageTableItem]
 
 
 class MessagePayload(BaseModel):
     content: str
+
+
+class SendMessageResponse(BaseModel):
+    user_message: MessageTableItem
+    bot_response: MessageTableItem
+
+
+class EditMessageResponse(BaseModel):
+    id_message: str
+    content: str
+
+
+class DeleteMessageResponse(BaseModel):
+    id_message: str
+    status: str
+
+
+class BatchDeletePayload(BaseModel):
+    ids: List[str] = Field(..., min_length=1)
+
+
+class BatchDeleteResult(BaseModel):
+    id_message: str
+    status: str
+
+
+class BatchDeleteResponse(BaseModel):
+    deleted: int
+    results: List[BatchDeleteResult]
+
+
+class UserMessageStats(BaseModel):
+    id_user: str
+    user_messages: int = 0
+    bot_messages: int = 0
+    total_messages: int = 0
+    bot_user_ratio: Optional[float] = None
+    last_activity: Optional[str] = None
@@ -0,0 +1,183 @@
+import asyncio
+import cProfile
+import hmac
+import logging
+import os
+import random
+import re
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from app import config
+
+logger = logging.getLogger("app.profiling")
+
+PROFILE_HEADER = b"x-profile-token"
+EVENT_STREAM = b"text/event-stream"
+
+
+class Profiler:
+    """
+    Runtime-adjustable profiling settings and storage of the results.
+
+    A request is profiled when it is sampled (`sample_rate`) or, when
+    `allow_header` is on, when it carries an `X-Profile-Token` header equal to
+    `ADMIN_API_TOKEN`. Settings are per process and can be changed while the
+    application runs.
+
+    Event streams are never profiled, and a profile is cut after
+    `max_seconds`: a long-lived request would otherwise hold the only
+    profiling slot and collect everything else running on the loop.
+    """
+
+    def __init__(
+        self,
+        profiles_dir: str,
+        sample_rate: float = 0.0,
+        allow_header: bool = False,
+        max_profiles: int = 100,
+        max_seconds: float = 30.0,
+    ):
+        self.profiles_dir = profiles_dir
+        self.max_profiles = max_profiles
+        self.max_seconds = max_seconds
+        self._busy = False
+        self.configure(sample_rate=sample_rate, allow_header=allow_header)
+
+    def configure(
+        self, sample_rate: Optional[float] = None, allow_header: Optional[bool] = None
+    ) -> None:
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if allow_header is not None:
+            self.allow_header = allow_header
+        self.enabled = self.sample_rate > 0 or self.allow_header
+
+    def should_profile(self, scope) -> bool:
+        # cProfile hooks the whole thread, so requests are profiled one at a
+        # time; concurrent ones are skipped rather than mixed into the result.
+        if self._busy:
+            return False
+        headers = dict(scope["headers"])
+        if EVENT_STREAM in headers.get(b"accept", b""):
+            return False
+        if self.allow_header and config.ADMIN_API_TOKEN:
+            token = headers.get(PROFILE_HEADER)
+            if token is not None:
+                return hmac.compare_digest(
+                    token, config.ADMIN_API_TOKEN.encode("utf-8")
+                )
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def list_profiles(self) -> List[dict]:
+        if not os.path.isdir(self.profiles_dir):
+            return []
+        profiles = []
+        for entry in os.scandir(self.profiles_dir):
+            if entry.name.endswith(".pstats"):
+                stat = entry.stat()
+                profiles.append(
+                    {
+                        "name": entry.name,
+                        "size": stat.st_size,
+                        "created_at": datetime.utcfromtimestamp(
+                            stat.st_mtime
+                        ).isoformat(),
+                    }
+                )
+        return sorted(profiles, key=lambda profile: profile["name"], reverse=True)
+
+    def profile_path(self, name: str) -> Optional[str]:
+        if os.path.basename(name) != name or not name.endswith(".pstats"):
+            return None
+        path = os.path.join(self.profiles_dir, name)
+        return path if os.path.isfile(path) else None
+
+    def _save(self, profile: cProfile.Profile, scope, duration: float) -> str:
+        os.makedirs(self.profiles_dir, exist_ok=True)
+        route = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+        name = (
+            f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{scope['method']}-"
+            f"{route}-{duration * 1000:.0f}ms.pstats"
+        )
+        path = os.path.join(self.profiles_dir, name)
+        profile.dump_stats(path)
+        for stale in self.list_profiles()[self.max_profiles :]:
+            os.remove(os.path.join(self.profiles_dir, stale["name"]))
+        return name
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware running cProfile around the requests selected by the
+    `Profiler`. When profiling is disabled it only checks one attribute.
+
+    Profiling stops, and what was collected is stored, when the request ends,
+    when it turns out to be an event stream, or after `max_seconds`.
+    """
+
+    def __init__(self, app, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        profiler = self.profiler
+        if (
+            not profiler.enabled
+            or scope["type"] != "http"
+            or not profiler.should_profile(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        loop = asyncio.get_running_loop()
+        saving = None
+
+        def stop():
+            nonlocal saving
+            if saving is None:
+                profile.disable()
+                profiler._busy = False
+                duration = time.perf_counter() - start
+                saving = loop.create_task(self._store(profile, scope, duration))
+            return saving
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                content_type = dict(message.get("headers", [])).get(
+                    b"content-type", b""
+                )
+                if content_type.startswith(EVENT_STREAM):
+                    stop()
+            await send(message)
+
+        profiler._busy = True
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        timer = loop.call_later(profiler.max_seconds, stop)
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            timer.cancel()
+            await stop()
+
+    async def _store(self, profile: cProfile.Profile, scope, duration: float) -> None:
+        try:
+            name = await asyncio.to_thread(
+                self.profiler._save, profile, scope, duration
+            )
+            logger.info(f"Stored profile {name}")
+        except Exception as e:
+            logger.error(f"Could not store profile: {e}")
+
+
+def create_profiler() -> Profiler:
+    return Profiler(
+        profiles_dir=config.PROFILES_DIR,
+        sample_rate=config.PROFILING_SAMPLE_RATE,
+        allow_header=config.PROFILING_ALLOW_HEADER,
+        max_profiles=config.PROFILES_MAX_FILES,
+        max_seconds=config.PROFILING_MAX_SECONDS,
+    )
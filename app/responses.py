@@ -0,0 +1,48 @@
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    Default JSON response class for the application.
+
+    Renders with orjson when it is installed and falls back to the standard
+    library encoder otherwise, so the app keeps working without the extra.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+
+
+def model_response(model: BaseModel, status_code: int = 200) -> Response:
+    """
+    Serializes an already validated model straight to JSON bytes.
+
+    Returning a `Response` makes FastAPI skip the `response_model` validation
+    and encoding pass, so the model is validated exactly once (when it is built
+    from the DynamoDB item) and dumped by pydantic-core.
+
+    Args:
+        model (BaseModel): The validated response model.
+        status_code (int): HTTP status code of the response.
+
+    Returns:
+        Response: A JSON response with the serialized model as body.
+    """
+    return Response(
+        content=model.model_dump_json(),
+        status_code=status_code,
+        media_type="application/json",
+    )
@@ -0,0 +1,304 @@
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from app.auth import get_current_user
+from app.dependencies import (
+    get_messages_table,
+    get_conversations_table,
+    get_context_store,
+    get_user_stats_store,
+    get_event_hub,
+)
+from app.models.users import User
+from app.models.messages import (
+    MessageTableItem,
+    MessageTableList,
+    MessagePayload,
+    SendMessageResponse,
+)
+from app.models.conversations import (
+    ConversationCreate,
+    ConversationItem,
+    ConversationList,
+    DeleteConversationResponse,
+)
+from app.responses import model_response
+from app.utils.conversations import update_conversation_summary
+from app.utils.dynamo import batch_delete_items
+from app.utils.events import conversation_deleted, message_created
+from app.utils.messages import store_exchange
+from typing import Optional
+from app import config
+from datetime import datetime
+import uuid
+import logging
+
+router = APIRouter(
+    prefix="/conversations",
+    tags=["Conversations"],
+    dependencies=[Depends(get_current_user)],
+)
+
+logger = logging.getLogger("app.routers.conversations")
+
+CONVERSATION_MESSAGES_INDEX = "id_conversation-timestamp-index"
+USER_CONVERSATIONS_INDEX = "id_user-updated_at-index"
+
+
+def _get_conversation(conversations_table, id_user: str, id_conversation: str) -> dict:
+    response = conversations_table.get_item(
+        Key={"id_user": id_user, "id_conversation": id_conversation}
+    )
+    item = response.get("Item")
+    if not item:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return item
+
+
+@router.post("/", response_model=ConversationItem, status_code=status.HTTP_201_CREATED)
+async def create_conversation(
+    conversation: ConversationCreate,
+    current_user: User = Depends(get_current_user),
+    conversations_table=Depends(get_conversations_table),
+):
+    timestamp = datetime.utcnow().isoformat()
+    item = {
+        "id_conversation": str(uuid.uuid4()),
+        "id_user": current_user.sub,
+        "created_at": timestamp,
+        "updated_at": timestamp,
+        "message_count": 0,
+    }
+    if conversation.title:
+        item["title"] = conversation.title
+
+    try:
+        conversations_table.put_item(Item=item)
+        logger.info(
+            f"Conversation {item['id_conversation']} created by user {current_user.username}"
+        )
+    except Exception as e:
+        logger.error(f"Error creating conversation: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    return model_response(
+        ConversationItem.model_validate(item), status_code=status.HTTP_201_CREATED
+    )
+
+
+@router.get("/", response_model=ConversationList)
+async def list_conversations(
+    current_user: User = Depends(get_current_user),
+    conversations_table=Depends(get_conversations_table),
+    limit: Optional[int] = Query(50, ge=1, le=100),
+    before: Optional[str] = Query(None),
+):
+    """
+    List the authenticated user's conversations, most recently active first.
+
+    Each conversation carries its last message and message count, so this
+    reads conversation rows only.
+
+    - **limit**: Max number of conversations to return (default 50, max 100).
+    - **before**: Only return conversations last active before this time (the
+      `updated_at` of the last conversation of the previous page).
+    """
+    try:
+        query_kwargs = {
+            "IndexName": USER_CONVERSATIONS_INDEX,
+            "KeyConditionExpression": "id_user = :id_user",
+            "ExpressionAttributeValues": {":id_user": current_user.sub},
+            "ScanIndexForward": False,
+            "Limit": limit,
+        }
+        if before:
+            query_kwargs["KeyConditionExpression"] += " AND updated_at < :before"
+            query_kwargs["ExpressionAttributeValues"][":before"] = before
+        response = conversations_table.query(**query_kwargs)
+        conversation_list = ConversationList.model_validate(
+            {"conversations": response.get("Items", [])}
+        )
+        return model_response(conversation_list)
+    except Exception as e:
+        logger.error(
+            f"Error listing conversations for user {current_user.username}: {e}",
+            exc_info=True,
+        )
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.delete("/{id_conversation}", response_model=DeleteConversationResponse)
+async def delete_conversation(
+    id_conversation: str,
+    current_user: User = Depends(get_current_user),
+    messages_table=Depends(get_messages_table),
+    conversations_table=Depends(get_conversations_table),
+    context_store=Depends(get_context_store),
+    user_stats_store=Depends(get_user_stats_store),
+    event_hub=Depends(get_event_hub),
+):
+    """
+    Delete a conversation together with all of its messages.
+    """
+    try:
+        _get_conversation(conversations_table, current_user.sub, id_conversation)
+
+        # Remove the conversation row first so concurrent sends stop updating it.
+        conversations_table.delete_item(
+            Key={"id_user": current_user.sub, "id_conversation": id_conversation}
+        )
+
+        deleted_messages = 0
+        deleted_bot_messages = 0
+        query_kwargs = {
+            "IndexName": CONVERSATION_MESSAGES_INDEX,
+            "KeyConditionExpression": "id_conversation = :id_conversation",
+            "FilterExpression": "id_user = :id_user",
+            "ExpressionAttributeValues": {
+                ":id_conversation": id_conversation,
+                ":id_user": current_user.sub,
+            },
+            "ProjectionExpression": "id_message, id_user, is_bot",
+        }
+        # Pages are queried in a worker thread and deleted concurrently, so a
+        # long thread does not block the event loop.
+        while True:
+            response = await asyncio.to_thread(messages_table.query, **query_kwargs)
+            items = response.get("Items", [])
+            failed_keys = await batch_delete_items(
+                messages_table,
+                [
+                    {"id_message": item["id_message"], "id_user": item["id_user"]}
+                    for item in items
+                ],
+                concurrency=config.DYNAMO_BATCH_CONCURRENCY,
+            )
+            failed_ids = {key["id_message"] for key in failed_keys}
+            for item in items:
+                if item["id_message"] in failed_ids:
+                    continue
+                deleted_messages += 1
+                deleted_bot_messages += int(item.get("is_bot", False))
+            if failed_ids:
+                logger.warning(
+                    f"Failed to delete {len(failed_ids)} messages of conversation {id_conversation}"
+                )
+            if "LastEvaluatedKey" not in response:
+                break
+            query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        context_store.remove_conversation(current_user.sub, id_conversation)
+        if deleted_messages:
+            user_stats_store.record(
+                current_user.sub,
+                user_delta=-(deleted_messages - deleted_bot_messages),
+                bot_delta=-deleted_bot_messages,
+            )
+        await event_hub.publish(
+            current_user.sub, [conversation_deleted(id_conversation)]
+        )
+
+        logger.info(
+            f"Conversation {id_conversation} and {deleted_messages} messages deleted by user {current_user.username}"
+        )
+        return model_response(
+            DeleteConversationResponse(
+                id_conversation=id_conversation,
+                status="deleted",
+                deleted_messages=deleted_messages,
+            )
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(
+            f"Error deleting conversation {id_conversation}: {e}", exc_info=True
+        )
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/{id_conversation}/messages", response_model=MessageTableList)
+async def list_conversation_messages(
+    id_conversation: str,
+    current_user: User = Depends(get_current_user),
+    messages_table=Depends(get_messages_table),
+    conversations_table=Depends(get_conversations_table),
+    limit: Optional[int] = Query(50, ge=1, le=100),
+    before: Optional[str] = Query(None),
+):
+    """
+    List the messages of one conversation, newest first.
+
+    - **limit**: Max number of messages to return (default 50, max 100).
+    - **before**: Only return messages older than this timestamp (the
+      `timestamp` of the oldest message of the previous page).
+    """
+    try:
+        _get_conversation(conversations_table, current_user.sub, id_conversation)
+
+        query_kwargs = {
+            "IndexName": CONVERSATION_MESSAGES_INDEX,
+            "KeyConditionExpression": "id_conversation = :id_conversation",
+            "ExpressionAttributeValues": {":id_conversation": id_conversation},
+            "ScanIndexForward": False,
+            "Limit": limit,
+        }
+        if before:
+            query_kwargs["KeyConditionExpression"] += " AND #ts < :before"
+            query_kwargs["ExpressionAttributeNames"] = {"#ts": "timestamp"}
+            query_kwargs["ExpressionAttributeValues"][":before"] = before
+        response = messages_table.query(**query_kwargs)
+
+        message_list = MessageTableList.model_validate(
+            {"messages": response.get("Items", [])}
+        )
+        return model_response(message_list)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(
+            f"Error retrieving messages of conversation {id_conversation}: {e}",
+            exc_info=True,
+        )
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.post("/{id_conversation}/messages", response_model=SendMessageResponse)
+async def send_conversation_message(
+    id_conversation: str,
+    message: MessagePayload,
+    current_user: User = Depends(get_current_user),
+    messages_table=Depends(get_messages_table),
+    conversations_table=Depends(get_conversations_table),
+    context_store=Depends(get_context_store),
+    user_stats_store=Depends(get_user_stats_store),
+    event_hub=Depends(get_event_hub),
+):
+    _get_conversation(conversations_table, current_user.sub, id_conversation)
+
+    user_message_item, bot_message_item = store_exchange(
+        messages_table,
+        current_user.sub,
+        message.content,
+        id_conversation,
+        context_store=context_store,
+        user_stats_store=user_stats_store,
+    )
+    update_conversation_summary(
+        conversations_table,
+        current_user.sub,
+        id_conversation,
+        count_delta=2,
+        last_message_item=bot_message_item,
+    )
+
+    response = SendMessageResponse(
+        user_message=MessageTableItem(**user_message_item),
+        bot_response=MessageTableItem(**bot_message_item),
+    )
+    await event_hub.publish(
+        current_user.sub,
+        [
+            message_created(response.user_message.model_dump()),
+            message_created(response.bot_response.model_dump()),
+        ],
+    )
+    return model_response(response)
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from app.auth import require_admin
+from app.dependencies import get_profiler
+from app.models.debug import (
+    ProfilingSettings,
+    ProfilingSettingsUpdate,
+    ProfileList,
+)
+from app.profiling import Profiler
+from app.responses import model_response
+import logging
+
+router = APIRouter(
+    prefix="/debug",
+    tags=["Debug"],
+    dependencies=[Depends(require_admin)],
+)
+
+logger = logging.getLogger("app.routers.debug")
+
+
+def _settings(profiler: Profiler) -> ProfilingSettings:
+    return ProfilingSettings(
+        sample_rate=profiler.sample_rate, allow_header=profiler.allow_header
+    )
+
+
+@router.get("/profiling", response_model=ProfilingSettings)
+async def get_profiling_settings(profiler: Profiler = Depends(get_profiler)):
+    return model_response(_settings(profiler))
+
+
+@router.put("/profiling", response_model=ProfilingSettings)
+async def update_profiling_settings(
+    update: ProfilingSettingsUpdate, profiler: Profiler = Depends(get_profiler)
+):
+    """
+    Change the profiling settings of this worker process, without a restart.
+
+    - **sample_rate**: Fraction of requests profiled (0 disables sampling).
+    - **allow_header**: Profile requests sent with an `X-Profile-Token`
+      header equal to the admin token.
+    """
+    profiler.configure(sample_rate=update.sample_rate, allow_header=update.allow_header)
+    logger.info(
+        f"Profiling settings changed: sample_rate={profiler.sample_rate}, "
+        f"allow_header={profiler.allow_header}"
+    )
+    return model_response(_settings(profiler))
+
+
+@router.get("/profiles", response_model=ProfileList)
+async def list_profiles(profiler: Profiler = Depends(get_profiler)):
+    return model_response(ProfileList(profiles=profiler.list_profiles()))
+
+
+@router.get("/profiles/{name}")
+async def download_profile(name: str, profiler: Profiler = Depends(get_profiler)):
+    """
+    Download a stored profile, in `pstats` format (open with
+    `python -m pstats`, snakeviz or convert for speedscope).
+    """
+    path = profiler.profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
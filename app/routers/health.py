@@ -1,4 +1,7 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, status
+from app.dependencies import get_readiness_monitor
+from app.models.health import ReadinessStatus
+from app.responses import model_response
 
 router = APIRouter()
 
@@ -6,3 +9,26 @@ router = APIRouter()
 @router.get("/health", tags=["Health"])
 async def health_check():
     return {"status": "OK"}
+
+
+@router.get("/health/live", tags=["Health"])
+async def liveness_check():
+    return {"status": "OK"}
+
+
+@router.get("/health/ready", response_model=ReadinessStatus, tags=["Health"])
+async def readiness_check(readiness=Depends(get_readiness_monitor)):
+    """
+    Reports the cached results of the background dependency probes; never
+    calls JWKS, DynamoDB or Cognito itself.
+    """
+    if readiness is None:
+        ready, checks = False, {}
+    else:
+        ready, checks = readiness.snapshot()
+    return model_response(
+        ReadinessStatus(status="ready" if ready else "not_ready", checks=checks),
+        status_code=(
+            status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE
+        ),
+    )
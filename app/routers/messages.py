@@ -1,15 +1,36 @@
+import asyncio
+import json
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from app.auth import get_current_user
+from app.dependencies import (
+    get_messages_table,
+    get_conversations_table,
+    get_context_store,
+    get_user_stats_store,
+    get_event_hub,
+)
 from app.models.users import User
-from app.models.messages import MessageTableItem, MessageTableList, MessagePayload
-from app.utils.chatbot import generate_bot_response
+from app.models.messages import (
+    MessageTableItem,
+    MessageTableList,
+    MessagePayload,
+    SendMessageResponse,
+    EditMessageResponse,
+    DeleteMessageResponse,
+    BatchDeletePayload,
+    BatchDeleteResponse,
+    UserMessageStats,
+)
+from app.responses import model_response
+from app.utils.messages import store_exchange, delete_user_messages
+from app.utils.dynamo import batch_get_items
+from app.utils.conversations import update_conversation_summary
+from app.utils.events import message_created, message_deleted, message_updated
 from fastapi import Query
 from typing import Optional
 from app import config
-import uuid
-import boto3
-from datetime import datetime
 import logging
 
 router = APIRouter(
@@ -21,13 +42,11 @@ router = APIRouter(
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-dynamodb = boto3.resource("dynamodb")
-messages_table = dynamodb.Table(config.DYNAMO_MESSAGES_TABLE)
-
 
 @router.get("/", response_model=MessageTableList)
 async def list_messages(
     current_user: User = Depends(get_current_user),
+    messages_table=Depends(get_messages_table),
     limit: Optional[int] = Query(50, ge=1, le=100),
     last_evaluated_key: Optional[str] = Query(None),
 ):
@@ -38,35 +57,25 @@ async def list_messages(
     - **last_evaluated_key**: Last evaluated key from a previous query.
     """
     try:
+        query_kwargs = {
+            "IndexName": "id_user-timestamp-index",
+            "KeyConditionExpression": "id_user = :id_user",
+            "ExpressionAttributeValues": {":id_user": current_user.sub},
+            "ScanIndexForward": False,
+            "Limit": limit,
+        }
         if last_evaluated_key:
-            response = messages_table.query(
-                IndexName="id_user-timestamp-index",
-                KeyConditionExpression=boto3.dynamodb.conditions.Key("id_user").eq(
-                    current_user.sub
-                ),
-                ScanIndexForward=False,
-                Limit=limit,
-                ExclusiveStartKey={"message_id": last_evaluated_key},
-            )
-        else:
-            response = messages_table.query(
-                IndexName="id_user-timestamp-index",
-                KeyConditionExpression=boto3.dynamodb.conditions.Key("id_user").eq(
-                    current_user.sub
-                ),
-                ScanIndexForward=False,
-                Limit=limit,
-            )
+            query_kwargs["ExclusiveStartKey"] = {"message_id": last_evaluated_key}
+        response = messages_table.query(**query_kwargs)
 
         items = response.get("Items", [])
-        messages = [MessageTableItem(**item) for item in items]
-        last_key = response.get("LastEvaluatedKey", {}).get("message_id")
+        message_list = MessageTableList.model_validate({"messages": items})
 
         logger.info(
-            f"Retrieved {len(messages)} messages for user {current_user.username}"
+            f"Retrieved {len(message_list.messages)} messages for user {current_user.username}"
         )
 
-        return MessageTableList(messages=messages)
+        return model_response(message_list)
     except Exception as e:
         logger.error(
             f"Error retrieving messages for user {current_user.username}: {e}",
@@ -75,59 +84,263 @@ async def list_messages(
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
-@router.post("/")
-async def send_message(
-    message: MessagePayload, current_user: User = Depends(get_current_user)
+@router.get("/stats", response_model=UserMessageStats)
+async def get_message_stats(
+    current_user: User = Depends(get_current_user),
+    user_stats_store=Depends(get_user_stats_store),
 ):
-    id_message = str(uuid.uuid4())
-    timestamp = datetime.now().isoformat()
-    id_user = current_user.sub
-
-    user_message_item = {
-        "id_message": id_message,
-        "id_user": id_user,
-        "content": message.content,
-        "timestamp": timestamp,
-        "is_bot": False,
-    }
+    """
+    Message counts and last activity of the authenticated user.
 
+    Served from incrementally maintained counters, so the cost does not
+    depend on the size of the history.
+    """
     try:
-        messages_table.put_item(Item=user_message_item)
-        logger.info(f"User message stored: {user_message_item}")
+        item = user_stats_store.get(current_user.sub)
+        user_messages = int(item.get("user_messages", 0))
+        bot_messages = int(item.get("bot_messages", 0))
+        return model_response(
+            UserMessageStats(
+                id_user=current_user.sub,
+                user_messages=user_messages,
+                bot_messages=bot_messages,
+                total_messages=user_messages + bot_messages,
+                bot_user_ratio=(
+                    bot_messages / user_messages if user_messages else None
+                ),
+                last_activity=item.get("last_activity"),
+            )
+        )
     except Exception as e:
-        logger.error(f"Error storing user message: {e}")
+        logger.error(
+            f"Error retrieving message stats for user {current_user.username}: {e}",
+            exc_info=True,
+        )
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-    bot_response_content = generate_bot_response(message.content)
-    bot_id_message = str(uuid.uuid4())
-    bot_timestamp = datetime.utcnow().isoformat()
 
-    bot_message_item = {
-        "id_message": bot_id_message,
-        "id_user": id_user,
-        "content": bot_response_content,
-        "timestamp": bot_timestamp,
-        "is_bot": True,
-    }
+@router.get("/stream")
+async def stream_messages(
+    current_user: User = Depends(get_current_user),
+    event_hub=Depends(get_event_hub),
+):
+    """
+    Server-sent events with the changes to the authenticated user's messages,
+    from any device: `message.created`, `message.updated`, `message.deleted`
+    and `conversation.deleted`.
+
+    A `resync` event means events were dropped because the connection fell
+    behind; the client should reload `GET /messages/`.
+    """
+    subscription = event_hub.subscribe(current_user.sub)
+    logger.info(f"Message stream opened by user {current_user.username}")
+
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not subscription.closed:
+                events = await subscription.get(timeout=config.EVENTS_HEARTBEAT_SECONDS)
+                if events:
+                    yield "".join(
+                        f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                        for event in events
+                    )
+                elif not subscription.closed:
+                    yield ": keep-alive\n\n"
+        finally:
+            event_hub.unsubscribe(subscription)
+            logger.info(f"Message stream closed by user {current_user.username}")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/", response_model=SendMessageResponse)
+async def send_message(
+    message: MessagePayload,
+    current_user: User = Depends(get_current_user),
+    messages_table=Depends(get_messages_table),
+    context_store=Depends(get_context_store),
+    user_stats_store=Depends(get_user_stats_store),
+    event_hub=Depends(get_event_hub),
+):
+    user_message_item, bot_message_item = store_exchange(
+        messages_table,
+        current_user.sub,
+        message.content,
+        context_store=context_store,
+        user_stats_store=user_stats_store,
+    )
+
+    response = SendMessageResponse(
+        user_message=MessageTableItem(**user_message_item),
+        bot_response=MessageTableItem(**bot_message_item),
+    )
+    await event_hub.publish(
+        current_user.sub,
+        [
+            message_created(response.user_message.model_dump()),
+            message_created(response.bot_response.model_dump()),
+        ],
+    )
+    return model_response(response)
+
+
+@router.post("/batch-delete", response_model=BatchDeleteResponse)
+async def batch_delete_messages(
+    payload: BatchDeletePayload,
+    current_user: User = Depends(get_current_user),
+    messages_table=Depends(get_messages_table),
+    conversations_table=Depends(get_conversations_table),
+    context_store=Depends(get_context_store),
+    user_stats_store=Depends(get_user_stats_store),
+    event_hub=Depends(get_event_hub),
+):
+    """
+    Delete several of the user's messages at once.
+
+    Returns the outcome of every requested id: `deleted`, `bot_message` (bot
+    messages cannot be deleted), `not_found` or `failed`.
+    """
+    ids = list(dict.fromkeys(payload.ids))
+    if len(ids) > config.MESSAGES_BATCH_DELETE_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {config.MESSAGES_BATCH_DELETE_MAX_IDS} ids per request",
+        )
 
     try:
-        messages_table.put_item(Item=bot_message_item)
-        logger.info(f"Bot message stored: {bot_message_item}")
+        items = await batch_get_items(
+            messages_table,
+            [
+                {"id_message": id_message, "id_user": current_user.sub}
+                for id_message in ids
+            ],
+            projection="id_message, id_user, is_bot, id_conversation",
+            concurrency=config.DYNAMO_BATCH_CONCURRENCY,
+        )
+        found_ids = {item["id_message"] for item in items}
+        result = await delete_user_messages(
+            messages_table,
+            conversations_table,
+            context_store,
+            user_stats_store,
+            current_user.sub,
+            items,
+            missing_ids=[
+                id_message for id_message in ids if id_message not in found_ids
+            ],
+        )
+        await event_hub.publish(
+            current_user.sub,
+            [
+                message_deleted(entry.id_message)
+                for entry in result.results
+                if entry.status == "deleted"
+            ],
+        )
+        return model_response(result)
     except Exception as e:
-        logger.error(f"Error storing bot message: {e}")
+        logger.error(
+            f"Error batch deleting messages for user {current_user.username}: {e}",
+            exc_info=True,
+        )
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-    return {
-        "user_message": user_message_item,
-        "bot_response": bot_message_item,
-    }
+
+@router.delete("/", response_model=BatchDeleteResponse)
+async def clear_messages(
+    current_user: User = Depends(get_current_user),
+    messages_table=Depends(get_messages_table),
+    conversations_table=Depends(get_conversations_table),
+    context_store=Depends(get_context_store),
+    user_stats_store=Depends(get_user_stats_store),
+    event_hub=Depends(get_event_hub),
+    id_conversation: Optional[str] = Query(None),
+):
+    """
+    Delete all of the user's own messages, bot replies excepted.
+
+    - **id_conversation**: Only clear this conversation.
+    """
+    try:
+        if id_conversation:
+            response = conversations_table.get_item(
+                Key={"id_user": current_user.sub, "id_conversation": id_conversation}
+            )
+            if not response.get("Item"):
+                raise HTTPException(status_code=404, detail="Conversation not found")
+            query_kwargs = {
+                "IndexName": "id_conversation-timestamp-index",
+                "KeyConditionExpression": "id_conversation = :id_conversation",
+                "FilterExpression": "id_user = :id_user",
+                "ExpressionAttributeValues": {
+                    ":id_conversation": id_conversation,
+                    ":id_user": current_user.sub,
+                },
+            }
+        else:
+            query_kwargs = {
+                "IndexName": "id_user-timestamp-index",
+                "KeyConditionExpression": "id_user = :id_user",
+                "ExpressionAttributeValues": {":id_user": current_user.sub},
+            }
+        query_kwargs["ProjectionExpression"] = (
+            "id_message, id_user, is_bot, id_conversation"
+        )
+
+        # Each page is deleted as it arrives, so a long history is never
+        # held in memory and the queries do not block the event loop.
+        deleted = 0
+        results = []
+        while True:
+            response = await asyncio.to_thread(messages_table.query, **query_kwargs)
+            items = response.get("Items", [])
+            if items:
+                page = await delete_user_messages(
+                    messages_table,
+                    conversations_table,
+                    context_store,
+                    user_stats_store,
+                    current_user.sub,
+                    items,
+                )
+                deleted += page.deleted
+                results.extend(page.results)
+                await event_hub.publish(
+                    current_user.sub,
+                    [
+                        message_deleted(entry.id_message)
+                        for entry in page.results
+                        if entry.status == "deleted"
+                    ],
+                )
+            if "LastEvaluatedKey" not in response:
+                break
+            query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+        return model_response(BatchDeleteResponse(deleted=deleted, results=results))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(
+            f"Error clearing messages for user {current_user.username}: {e}",
+            exc_info=True,
+        )
+        raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
-@router.put("/{id_message}")
+@router.put("/{id_message}", response_model=EditMessageResponse)
 async def edit_message(
     id_message: str,
     edit: MessagePayload,
     current_user: User = Depends(get_current_user),
+    messages_table=Depends(get_messages_table),
+    context_store=Depends(get_context_store),
+    event_hub=Depends(get_event_hub),
 ):
     try:
         response = messages_table.get_item(
@@ -148,17 +361,29 @@ async def edit_message(
             UpdateExpression="SET content = :val1",
             ExpressionAttributeValues={":val1": edit.content},
         )
+        context_store.edit(current_user.sub, id_message, edit.content)
+        await event_hub.publish(
+            current_user.sub, [message_updated(id_message, edit.content)]
+        )
         logger.info(f"Message {id_message} edited by user {current_user.username}")
 
-        return {"id_message": id_message, "content": edit.content}
+        return model_response(
+            EditMessageResponse(id_message=id_message, content=edit.content)
+        )
     except Exception as e:
         logger.error(f"Error editing message {id_message}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
-@router.delete("/{id_message}")
+@router.delete("/{id_message}", response_model=DeleteMessageResponse)
 async def delete_message(
-    id_message: str, current_user: User = Depends(get_current_user)
+    id_message: str,
+    current_user: User = Depends(get_current_user),
+    messages_table=Depends(get_messages_table),
+    conversations_table=Depends(get_conversations_table),
+    context_store=Depends(get_context_store),
+    user_stats_store=Depends(get_user_stats_store),
+    event_hub=Depends(get_event_hub),
 ):
     try:
         id_user = current_user.sub
@@ -176,9 +401,18 @@ async def delete_message(
             raise HTTPException(status_code=400, detail="Cannot delete bot messages")
 
         messages_table.delete_item(Key={"id_message": id_message, "id_user": id_user})
+        context_store.remove(id_user, [id_message])
+        user_stats_store.record(id_user, user_delta=-1)
+        if item.get("id_conversation"):
+            update_conversation_summary(
+                conversations_table, id_user, item["id_conversation"], count_delta=-1
+            )
+        await event_hub.publish(id_user, [message_deleted(id_message)])
         logger.info(f"Message {id_message} deleted by user {current_user.username}")
 
-        return {"id_message": id_message, "status": "deleted"}
+        return model_response(
+            DeleteMessageResponse(id_message=id_message, status="deleted")
+        )
     except Exception as e:
         logger.error(f"Error deleting message {id_message}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal Server Error")
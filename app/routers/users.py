@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import JSONResponse, Response
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from app.models.users import User, UserCreate, UserLogin
 from app.utils.auth import get_secret_hash
-from app.auth import get_current_user
+from app.utils.provisioning import create_cognito_user, parse_records, provision_users
+from app.auth import get_current_user, require_admin
+from app.dependencies import get_cognito_client
 import os
-import boto3
+import json
 from botocore.exceptions import ClientError
 import logging
 from app import config
@@ -16,7 +18,6 @@ router = APIRouter(
 
 logger = logging.getLogger("app.routers.users")
 
-cognito_client = boto3.client("cognito-idp")
 USER_POOL_ID = config.COGNITO_USER_POOL_ID
 CLIENT_ID = config.COGNITO_APP_CLIENT_ID
 CLIENT_SECRET = config.COGNITO_APP_CLIENT_SECRET
@@ -24,28 +25,10 @@ IS_PRODUCTION = config.ENV == "production"
 
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
-async def register_user(user: UserCreate):
+async def register_user(user: UserCreate, cognito_client=Depends(get_cognito_client)):
     logger.info(f"Registration attempt for email: {user.email}")
     try:
-        _ = cognito_client.admin_create_user(
-            UserPoolId=USER_POOL_ID,
-            Username=user.email,
-            UserAttributes=[
-                {"Name": "email", "Value": user.email},
-                {"Name": "email_verified", "Value": "true"},
-            ],
-            TemporaryPassword=user.password,
-            MessageAction="SUPPRESS",
-        )
-        logger.info(f"User {user.email} created successfully in Cognito.")
-
-        cognito_client.admin_set_user_password(
-            UserPoolId=USER_POOL_ID,
-            Username=user.email,
-            Password=user.password,
-            Permanent=True,
-        )
-
+        create_cognito_user(cognito_client, user)
         logger.info(f"User {user.email} created successfully in Cognito.")
 
         return {"message": "User created successfully"}
@@ -80,8 +63,35 @@ async def register_user(user: UserCreate):
         )
 
 
+@router.post("/bulk-register", dependencies=[Depends(require_admin)])
+async def bulk_register_users(
+    request: Request, cognito_client=Depends(get_cognito_client)
+):
+    """
+    Create many users from a CSV (`Content-Type: text/csv`, with an
+    `email,password` header) or NDJSON body.
+
+    Streams one NDJSON result per input line as users are created:
+    `{"line", "email", "status", "detail"}` with status `created`, `exists`,
+    `invalid` or `failed`. Posting the same file again is safe, so a partially
+    failed import can simply be resumed.
+    """
+    fmt = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    body = (await request.body()).decode("utf-8")
+    records = parse_records(body.splitlines(), fmt)
+    logger.info(f"Bulk registration started ({fmt}, {len(body)} bytes)")
+
+    async def results():
+        async for result in provision_users(
+            cognito_client, records, config.BULK_REGISTER_CONCURRENCY
+        ):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
 @router.post("/login", status_code=status.HTTP_200_OK)
-async def login_user(user: UserLogin):
+async def login_user(user: UserLogin, cognito_client=Depends(get_cognito_client)):
     logger.info(f"Login attempt for email: {user.email}")
     secret_hash = get_secret_hash(user.email, CLIENT_ID, CLIENT_SECRET)
     try:
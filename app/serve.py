@@ -0,0 +1,94 @@
+"""
+Production server entry point.
+
+Runs the application under uvicorn's process supervisor with one worker per
+core by default:
+
+    python -m app.serve
+
+All settings come from `app.config` (`WEB_CONCURRENCY`, `SERVER_*`).
+"""
+
+import importlib.util
+import logging
+
+import uvicorn
+
+from app import config
+
+logger = logging.getLogger("app.serve")
+
+APP_IMPORT_STRING = "app.main:app"
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def build_server_options() -> dict:
+    """
+    Collects the uvicorn options for the production server.
+
+    uvloop and httptools are used when they are installed (they are part of
+    `uvicorn[standard]`) and the pure-Python implementations otherwise.
+
+    Returns:
+        dict: Keyword arguments for `uvicorn.run`.
+    """
+    return {
+        "host": config.SERVER_HOST,
+        "port": config.SERVER_PORT,
+        "workers": config.WEB_CONCURRENCY,
+        "loop": "uvloop" if _available("uvloop") else "asyncio",
+        "http": "httptools" if _available("httptools") else "h11",
+        "backlog": config.SERVER_BACKLOG,
+        "timeout_keep_alive": config.SERVER_KEEP_ALIVE_SECONDS,
+        "limit_max_requests": config.SERVER_MAX_REQUESTS,
+        "limit_max_requests_jitter": config.SERVER_MAX_REQUESTS_JITTER,
+        # Bounds how long a stopping or recycled worker waits for in-flight
+        # requests; long-lived streams are cancelled after it.
+        "timeout_graceful_shutdown": config.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        "proxy_headers": True,
+        "access_log": False,
+    }
+
+
+def preload() -> None:
+    """
+    Imports the application and validates its configuration in the supervisor.
+
+    Workers are spawned as fresh interpreters, so this does not share memory
+    with them; it makes a broken build or a missing environment variable fail
+    once, before any worker is started, instead of crash-looping every worker.
+    """
+    importlib.import_module(APP_IMPORT_STRING.split(":")[0])
+    config.validate()
+
+
+def main() -> None:
+    options = build_server_options()
+    if options["workers"] == 1 and options["limit_max_requests"]:
+        # Without the multi-process supervisor nothing would restart the
+        # recycled worker and the whole server would exit.
+        logger.warning("SERVER_MAX_REQUESTS is ignored when running one worker.")
+        options["limit_max_requests"] = None
+    if options["workers"] > 1 and not config.EVENTS_REDIS_URL:
+        logger.warning(
+            "EVENTS_REDIS_URL is not set: message streams only receive the "
+            "changes handled by their own worker."
+        )
+    if config.SERVER_PRELOAD:
+        preload()
+    logger.info(
+        f"Starting {options['workers']} worker(s) on "
+        f"{options['host']}:{options['port']} "
+        f"(loop={options['loop']}, http={options['http']})"
+    )
+    # Each worker runs the application lifespan (client construction, JWKS and
+    # connection warm-up) before it starts accepting connections on the shared
+    # socket, so no request reaches a cold worker.
+    uvicorn.run(APP_IMPORT_STRING, **options)
+
+
+if __name__ == "__main__":
+    main()
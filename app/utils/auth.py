@@ -2,8 +2,9 @@ import hmac
 import hashlib
 import base64
 import urllib.request
-from functools import lru_cache
 import json
+import time
+from typing import Optional
 from fastapi import HTTPException, status
 import logging
 from app import config
@@ -34,18 +35,48 @@ def get_secret_hash(username: str, client_id: str, client_secret: str) -> str:
     return base64.b64encode(dig).decode()
 
 
-@lru_cache()
+_public_keys = None
+_public_keys_fetched_at = None
+
+
 def get_public_keys():
+    """
+    Returns the Cognito JWKS, fetching it on first use.
+
+    The keys are kept in memory until `refresh_public_keys` replaces them.
+    """
+    if _public_keys is None:
+        return refresh_public_keys()
+    return _public_keys
+
+
+def refresh_public_keys():
+    """
+    Fetches the JWKS again and swaps it in. The previous keys stay in use if
+    the fetch fails.
+    """
+    global _public_keys, _public_keys_fetched_at
     try:
         logger.info("Fetching public keys")
         with urllib.request.urlopen(config.COGNITO_KEYS_URL) as f:
             response = f.read()
         keys = json.loads(response.decode("utf-8"))["keys"]
         logger.debug(f"Public keys: {keys}")
-        return keys
     except Exception as e:
         logger.error(f"Error fetching public keys: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error fetching public keys",
         )
+    _public_keys = keys
+    _public_keys_fetched_at = time.monotonic()
+    return keys
+
+
+def public_keys_age() -> Optional[float]:
+    """
+    Seconds since the JWKS was last fetched, or None if it never was.
+    """
+    if _public_keys_fetched_at is None:
+        return None
+    return time.monotonic() - _public_keys_fetched_at
@@ -1,14 +1,33 @@
-def generate_bot_response(user_input):
-    # Enhanced chatbot logic
-    user_input = user_input.lower()
+FOLLOW_UP_WORDS = ("more", "again", "another")
+
 
-    if "hello" in user_input or "hi" in user_input:
+def _topic_response(text):
+    if "hello" in text or "hi" in text:
         return "Hello! How can I assist you today?"
-    elif "help" in user_input:
+    elif "help" in text:
         return "Sure, I'm here to help. Please tell me more about what you need."
-    elif "weather" in user_input:
+    elif "weather" in text:
         return "The weather is sunny with a chance of rainbows!"
-    elif "joke" in user_input:
+    elif "joke" in text:
         return "Why did the developer go broke? Because they used up all their cache!"
-    else:
-        return "I'm sorry, I didn't quite catch that. Could you please elaborate?"
+    return None
+
+
+def generate_bot_response(user_input, history=None):
+    # Enhanced chatbot logic
+    user_input = user_input.lower()
+
+    response = _topic_response(user_input)
+    if response:
+        return response
+
+    # Follow-ups ("tell me another one") pick up the topic of the latest user
+    # turn in the conversation context.
+    if history and any(word in user_input for word in FOLLOW_UP_WORDS):
+        for turn in reversed(history):
+            if not turn.is_bot:
+                response = _topic_response(turn.content.lower())
+                if response:
+                    return response
+
+    return "I'm sorry, I didn't quite catch that. Could you please elaborate?"
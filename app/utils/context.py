@@ -0,0 +1,224 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Iterable, List, NamedTuple, Optional
+
+logger = logging.getLogger("app.utils.context")
+
+# Rough per-turn cost of the tuple, ids and deque slot on top of the content.
+TURN_OVERHEAD_BYTES = 200
+
+
+class Turn(NamedTuple):
+    id_message: str
+    content: str
+    is_bot: bool
+    id_conversation: Optional[str] = None
+
+
+def turn_from_item(item: dict) -> Turn:
+    return Turn(
+        id_message=item["id_message"],
+        content=item["content"],
+        is_bot=bool(item.get("is_bot", False)),
+        id_conversation=item.get("id_conversation"),
+    )
+
+
+def _turn_size(turn: Turn) -> int:
+    return len(turn.content) + TURN_OVERHEAD_BYTES
+
+
+class ContextStore:
+    """
+    In-memory ring buffers of each user's most recent turns.
+
+    Every user gets a buffer of at most `max_turns` turns, filled by the send
+    path and hydrated from the messages table the first time the user is seen.
+    The buffers together stay under `max_bytes`; when the budget is exceeded the
+    least recently used users are evicted and will be hydrated again on their
+    next message. All methods are safe to call from several threads.
+
+    Each worker process has its own store. Changes made through other workers
+    arrive as message events (`apply_events`), and buffers older than
+    `max_age` seconds are read again from the table, which bounds how long a
+    missed event can leave a buffer stale.
+    """
+
+    def __init__(
+        self,
+        max_turns: int,
+        max_bytes: int,
+        max_age: float = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._clock = clock
+        self._buffers: "OrderedDict[str, deque]" = OrderedDict()
+        self._loaded_at = {}
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __contains__(self, id_user: str) -> bool:
+        return id_user in self._buffers
+
+    def window(
+        self,
+        id_user: str,
+        loader: Callable[[int], Iterable[dict]],
+        id_conversation: Optional[str] = None,
+    ) -> List[Turn]:
+        """
+        Returns the user's recent turns, oldest first.
+
+        Args:
+            id_user (str): The user whose turns are requested.
+            loader (Callable[[int], Iterable[dict]]): Called with `max_turns` on
+                a miss; must return the user's newest message items, oldest first.
+            id_conversation (Optional[str]): When given, only turns of that
+                conversation are returned.
+
+        Returns:
+            List[Turn]: The matching turns.
+        """
+        with self._lock:
+            buffer = self._touch(id_user)
+        if buffer is None:
+            turns = [turn_from_item(item) for item in loader(self.max_turns)]
+            with self._lock:
+                buffer = self._touch(id_user)
+                if buffer is None:
+                    buffer = self._create(id_user, turns)
+        with self._lock:
+            return [
+                turn
+                for turn in buffer
+                if id_conversation is None or turn.id_conversation == id_conversation
+            ]
+
+    def append(self, id_user: str, item: dict) -> None:
+        """
+        Adds a stored message to the user's buffer if the buffer is loaded.
+
+        Users that are not loaded are left alone: their next `window` call
+        hydrates from the table, which already holds the message. A message
+        already in the buffer is not added twice.
+        """
+        turn = turn_from_item(item)
+        with self._lock:
+            buffer = self._touch(id_user)
+            if buffer is None:
+                return
+            if any(existing.id_message == turn.id_message for existing in buffer):
+                return
+            if len(buffer) == buffer.maxlen:
+                self._account(id_user, -_turn_size(buffer[0]))
+            buffer.append(turn)
+            self._account(id_user, _turn_size(turn))
+            self._evict()
+
+    def edit(self, id_user: str, id_message: str, content: str) -> None:
+        with self._lock:
+            buffer = self._buffers.get(id_user)
+            if buffer is None:
+                return
+            for index, turn in enumerate(buffer):
+                if turn.id_message == id_message:
+                    buffer[index] = turn._replace(content=content)
+                    self._account(id_user, len(content) - len(turn.content))
+                    return
+
+    def remove(self, id_user: str, id_messages: Iterable[str]) -> None:
+        id_messages = set(id_messages)
+        self._filter(id_user, lambda turn: turn.id_message not in id_messages)
+
+    def remove_conversation(self, id_user: str, id_conversation: str) -> None:
+        self._filter(id_user, lambda turn: turn.id_conversation != id_conversation)
+
+    def invalidate(self, id_user: Optional[str] = None) -> None:
+        """
+        Drops the buffer of one user, or of every user when `id_user` is None.
+        """
+        with self._lock:
+            for loaded in list(self._buffers) if id_user is None else [id_user]:
+                if loaded in self._buffers:
+                    self._drop(loaded)
+
+    def apply_events(self, id_user: Optional[str], events: List[dict]) -> None:
+        """
+        Applies message events published on the event hub, so buffers stay in
+        sync with changes handled by other workers. Applying an event for a
+        change this worker already made is harmless.
+        """
+        if id_user is None:
+            self.invalidate()
+            return
+        for event in events:
+            if event["type"] == "message.created":
+                self.append(id_user, event["message"])
+            elif event["type"] == "message.updated":
+                self.edit(id_user, event["id_message"], event["content"])
+            elif event["type"] == "message.deleted":
+                self.remove(id_user, [event["id_message"]])
+            elif event["type"] == "conversation.deleted":
+                self.remove_conversation(id_user, event["id_conversation"])
+            elif event["type"] == "resync":
+                self.invalidate(id_user)
+
+    def _filter(self, id_user: str, keep: Callable[[Turn], bool]) -> None:
+        with self._lock:
+            buffer = self._buffers.get(id_user)
+            if buffer is None:
+                return
+            kept = [turn for turn in buffer if keep(turn)]
+            if len(kept) == len(buffer):
+                return
+            self._account(
+                id_user, sum(_turn_size(turn) for turn in kept) - self._sizes[id_user]
+            )
+            buffer.clear()
+            buffer.extend(kept)
+
+    def _touch(self, id_user: str) -> Optional[deque]:
+        buffer = self._buffers.get(id_user)
+        if buffer is None:
+            return None
+        if self.max_age and self._clock() - self._loaded_at[id_user] > self.max_age:
+            self._drop(id_user)
+            return None
+        self._buffers.move_to_end(id_user)
+        return buffer
+
+    def _create(self, id_user: str, turns: List[Turn]) -> deque:
+        buffer = deque(turns[-self.max_turns :], maxlen=self.max_turns)
+        self._buffers[id_user] = buffer
+        self._loaded_at[id_user] = self._clock()
+        self._sizes[id_user] = 0
+        self._account(id_user, sum(_turn_size(turn) for turn in buffer))
+        self._evict()
+        return buffer
+
+    def _account(self, id_user: str, delta: int) -> None:
+        self._sizes[id_user] += delta
+        self._total_bytes += delta
+
+    def _drop(self, id_user: str) -> None:
+        del self._buffers[id_user]
+        del self._loaded_at[id_user]
+        self._total_bytes -= self._sizes.pop(id_user)
+
+    def _evict(self) -> None:
+        # The most recently used buffer is never evicted, even when it alone
+        # exceeds the budget.
+        while self._total_bytes > self.max_bytes and len(self._buffers) > 1:
+            id_user = next(iter(self._buffers))
+            self._drop(id_user)
+            logger.debug(f"Evicted context of user {id_user}")
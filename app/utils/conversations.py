@@ -0,0 +1,54 @@
+import logging
+from typing import Optional
+
+logger = logging.getLogger("app.utils.conversations")
+
+LAST_MESSAGE_PREVIEW_LENGTH = 200
+
+
+def update_conversation_summary(
+    conversations_table,
+    id_user: str,
+    id_conversation: str,
+    count_delta: int,
+    last_message_item: Optional[dict] = None,
+) -> None:
+    """
+    Keeps the denormalized fields of a conversation row in step with its
+    messages, so listing conversations never reads message items.
+
+    The update is conditional on the conversation still existing, so a
+    message written while the conversation is being deleted does not
+    resurrect it. Failures are logged and not raised: the messages are
+    already stored and the summary is advisory.
+
+    Args:
+        conversations_table: The conversations table resource.
+        id_user (str): Owner of the conversation.
+        id_conversation (str): The conversation to update.
+        count_delta (int): Change applied to `message_count`.
+        last_message_item (Optional[dict]): Newest message, when one was added.
+    """
+    update_expression = "ADD message_count :count_delta"
+    values = {":count_delta": count_delta}
+    if last_message_item is not None:
+        update_expression = (
+            "SET last_message = :last_message, last_message_at = :last_message_at, "
+            "updated_at = :last_message_at " + update_expression
+        )
+        values[":last_message"] = last_message_item["content"][
+            :LAST_MESSAGE_PREVIEW_LENGTH
+        ]
+        values[":last_message_at"] = last_message_item["timestamp"]
+
+    try:
+        conversations_table.update_item(
+            Key={"id_user": id_user, "id_conversation": id_conversation},
+            UpdateExpression=update_expression,
+            ConditionExpression="attribute_exists(id_conversation)",
+            ExpressionAttributeValues=values,
+        )
+    except Exception as e:
+        logger.warning(
+            f"Could not update summary of conversation {id_conversation}: {e}"
+        )
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from typing import Iterator, List, Optional
+
+logger = logging.getLogger("app.utils.dynamo")
+
+BATCH_GET_LIMIT = 100
+BATCH_WRITE_LIMIT = 25
+
+
+def chunked(items: List, size: int) -> Iterator[List]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+async def _with_unprocessed_retries(
+    call, request, unprocessed_field, max_attempts, backoff
+):
+    """
+    Runs a batch call in a worker thread, re-sending what DynamoDB reports as
+    unprocessed with exponential backoff.
+
+    Returns:
+        Tuple[List[dict], dict]: The responses, and the request items that are
+        still unprocessed after `max_attempts`.
+    """
+    responses = []
+    for attempt in range(max_attempts):
+        response = await asyncio.to_thread(call, RequestItems=request)
+        responses.append(response)
+        request = response.get(unprocessed_field) or {}
+        if not request:
+            break
+        if attempt < max_attempts - 1:
+            await asyncio.sleep(backoff * 2**attempt)
+    return responses, request
+
+
+async def batch_get_items(
+    table,
+    keys: List[dict],
+    projection: Optional[str] = None,
+    concurrency: int = 4,
+    max_attempts: int = 5,
+    backoff: float = 0.05,
+) -> List[dict]:
+    """
+    Fetches items by key with chunked, concurrent `BatchGetItem` calls.
+
+    Args:
+        table: The table resource.
+        keys (List[dict]): Primary keys to fetch.
+        projection (Optional[str]): Projection expression; must include the keys.
+        concurrency (int): Max batch calls in flight.
+        max_attempts (int): Attempts per chunk, retrying unprocessed keys.
+        backoff (float): Initial delay between attempts, doubled each time.
+
+    Returns:
+        List[dict]: The items found, in no particular order.
+
+    Raises:
+        RuntimeError: If some keys are still unprocessed after all attempts.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    client = table.meta.client
+
+    async def fetch(chunk):
+        request = {table.name: {"Keys": chunk}}
+        if projection:
+            request[table.name]["ProjectionExpression"] = projection
+        async with semaphore:
+            responses, unprocessed = await _with_unprocessed_retries(
+                client.batch_get_item,
+                request,
+                "UnprocessedKeys",
+                max_attempts,
+                backoff,
+            )
+        if unprocessed:
+            raise RuntimeError("BatchGetItem left unprocessed keys after retries")
+        return [
+            item
+            for response in responses
+            for item in response.get("Responses", {}).get(table.name, [])
+        ]
+
+    pages = await asyncio.gather(
+        *(fetch(chunk) for chunk in chunked(keys, BATCH_GET_LIMIT))
+    )
+    return [item for page in pages for item in page]
+
+
+async def batch_delete_items(
+    table,
+    keys: List[dict],
+    concurrency: int = 4,
+    max_attempts: int = 5,
+    backoff: float = 0.05,
+) -> List[dict]:
+    """
+    Deletes items by key with chunked, concurrent `BatchWriteItem` calls.
+
+    Unprocessed items are retried with exponential backoff; a chunk whose
+    call fails outright is reported as failed without aborting the others.
+
+    Returns:
+        List[dict]: Keys that could not be deleted.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    client = table.meta.client
+
+    async def delete(chunk):
+        request = {table.name: [{"DeleteRequest": {"Key": key}} for key in chunk]}
+        try:
+            async with semaphore:
+                _, unprocessed = await _with_unprocessed_retries(
+                    client.batch_write_item,
+                    request,
+                    "UnprocessedItems",
+                    max_attempts,
+                    backoff,
+                )
+        except Exception as e:
+            logger.error(f"BatchWriteItem failed for {len(chunk)} keys: {e}")
+            return chunk
+        return [
+            entry["DeleteRequest"]["Key"] for entry in unprocessed.get(table.name, [])
+        ]
+
+    failed = await asyncio.gather(
+        *(delete(chunk) for chunk in chunked(keys, BATCH_WRITE_LIMIT))
+    )
+    return [key for chunk in failed for key in chunk]
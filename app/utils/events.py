@@ -0,0 +1,294 @@
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger("app.utils.events")
+
+# Handler called by a broker for every published batch: (id_user, events).
+# `id_user=None` addresses every local subscriber.
+EventHandler = Callable[[Optional[str], List[dict]], None]
+
+RESYNC = {"type": "resync"}
+
+
+def message_created(message: dict) -> dict:
+    return {"type": "message.created", "message": message}
+
+
+def message_updated(id_message: str, content: str) -> dict:
+    return {"type": "message.updated", "id_message": id_message, "content": content}
+
+
+def message_deleted(id_message: str) -> dict:
+    return {"type": "message.deleted", "id_message": id_message}
+
+
+def conversation_deleted(id_conversation: str) -> dict:
+    return {"type": "conversation.deleted", "id_conversation": id_conversation}
+
+
+def _event_key(event: dict) -> str:
+    if event["type"] == "message.created":
+        return event["message"]["id_message"]
+    if event["type"] == "conversation.deleted":
+        return f"conversation:{event['id_conversation']}"
+    return event["id_message"]
+
+
+class Broker(ABC):
+    """
+    Transport between the processes serving the application.
+
+    `publish` sends a batch of events to every process, the publisher
+    included; each process hands the batches it receives to the handler
+    registered with `subscribe`.
+    """
+
+    @abstractmethod
+    async def subscribe(self, handler: EventHandler) -> None: ...
+
+    @abstractmethod
+    async def publish(self, id_user: str, events: List[dict]) -> None: ...
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryBroker(Broker):
+    """
+    Delivers events inside the current process only: enough for a single
+    worker and for tests.
+    """
+
+    def __init__(self):
+        self._handlers: List[EventHandler] = []
+
+    async def subscribe(self, handler: EventHandler) -> None:
+        self._handlers.append(handler)
+
+    async def publish(self, id_user: str, events: List[dict]) -> None:
+        for handler in self._handlers:
+            handler(id_user, events)
+
+    async def close(self) -> None:
+        self._handlers.clear()
+
+
+class RedisBroker(Broker):
+    """
+    Delivers events to every worker and instance through a Redis pub/sub
+    channel.
+
+    Events published while the listener is disconnected are lost, so after
+    a reconnect every local subscriber is told to resync.
+    """
+
+    def __init__(self, url: str, channel: str = "chat-events"):
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(url, socket_connect_timeout=2)
+        self.channel = channel
+        self._task: Optional[asyncio.Task] = None
+
+    async def subscribe(self, handler: EventHandler) -> None:
+        self._task = asyncio.create_task(self._listen(handler))
+
+    async def publish(self, id_user: str, events: List[dict]) -> None:
+        await self._client.publish(
+            self.channel, json.dumps({"id_user": id_user, "events": events})
+        )
+
+    async def _listen(self, handler: EventHandler) -> None:
+        connected_before = False
+        while True:
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                if connected_before:
+                    handler(None, [RESYNC])
+                connected_before = True
+                async for message in pubsub.listen():
+                    payload = json.loads(message["data"])
+                    handler(payload["id_user"], payload["events"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Event listener disconnected from Redis: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._client.aclose()
+
+
+class Subscription:
+    """
+    Pending events of one connected client.
+
+    Events waiting for the same message are coalesced (an edit is folded into
+    a pending creation, a deletion cancels it). When more than `max_pending`
+    distinct events pile up the backlog is dropped and the client receives a
+    single `resync` event telling it to reload its messages, so a stalled
+    connection holds a bounded amount of memory.
+
+    A closed subscription stops waiting; its stream ends once the remaining
+    events are sent.
+    """
+
+    def __init__(self, id_user: str, max_pending: int):
+        self.id_user = id_user
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._pending: "OrderedDict[str, dict]" = OrderedDict()
+        self._resync = False
+        self.closed = False
+        self._wakeup = asyncio.Event()
+
+    def push(self, events: List[dict]) -> None:
+        for event in events:
+            if self._resync:
+                # Everything after the overflow is covered by the reload.
+                self.dropped += 1
+                continue
+            if event["type"] == "resync":
+                self._overflow()
+                continue
+            key = _event_key(event)
+            previous = self._pending.get(key)
+            if previous is not None and previous["type"] == "message.created":
+                if event["type"] == "message.updated":
+                    message = {**previous["message"], "content": event["content"]}
+                    event = message_created(message)
+                elif event["type"] == "message.deleted":
+                    del self._pending[key]
+                    continue
+            elif previous is None and len(self._pending) >= self.max_pending:
+                self._overflow()
+                self.dropped += 1
+                continue
+            self._pending[key] = event
+        self._wakeup.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self._wakeup.set()
+
+    def _overflow(self) -> None:
+        self.dropped += len(self._pending)
+        self._pending.clear()
+        self._resync = True
+
+    async def get(self, timeout: float) -> List[dict]:
+        """
+        Waits up to `timeout` seconds for events and returns all of them, or
+        an empty list when none arrived or the subscription was closed.
+        """
+        if not self._pending and not self._resync and not self.closed:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return []
+        if self._resync:
+            self._resync = False
+            return [RESYNC]
+        events = list(self._pending.values())
+        self._pending.clear()
+        return events
+
+
+class EventHub:
+    """
+    Fans the message changes of a user out to all of their open connections.
+
+    Routers publish through the hub; the broker carries the events to every
+    process and each hub delivers them to its local subscriptions.
+    """
+
+    def __init__(self, broker: Broker, max_pending: int):
+        self.broker = broker
+        self.max_pending = max_pending
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        self._listeners: List[EventHandler] = []
+        self.closed = False
+
+    async def start(self) -> None:
+        await self.broker.subscribe(self._deliver)
+
+    def close(self) -> None:
+        """
+        Ends every open stream, and any opened afterwards, so the server can
+        shut down without waiting for clients to disconnect. Clients reconnect
+        on their own (SSE `retry`).
+        """
+        self.closed = True
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.close()
+
+    async def stop(self) -> None:
+        self.close()
+        await self.broker.close()
+
+    def add_listener(self, handler: EventHandler) -> None:
+        """
+        Registers a handler that receives every batch delivered to this
+        process, whether or not the user has an open stream.
+        """
+        self._listeners.append(handler)
+
+    def subscribe(self, id_user: str) -> Subscription:
+        subscription = Subscription(id_user, self.max_pending)
+        if self.closed:
+            subscription.close()
+        self._subscriptions.setdefault(id_user, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.id_user)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.id_user]
+
+    def subscriber_count(self, id_user: Optional[str] = None) -> int:
+        if id_user is not None:
+            return len(self._subscriptions.get(id_user, ()))
+        return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    async def publish(self, id_user: str, events: List[dict]) -> None:
+        """
+        Publishes events for a user. Failures are logged and never fail the
+        request that made the change: clients recover by reloading.
+        """
+        if not events:
+            return
+        try:
+            await self.broker.publish(id_user, events)
+        except Exception as e:
+            logger.warning(f"Failed to publish events for user {id_user}: {e}")
+
+    def _deliver(self, id_user: Optional[str], events: List[dict]) -> None:
+        for listener in self._listeners:
+            try:
+                listener(id_user, events)
+            except Exception as e:
+                logger.error(f"Event listener failed: {e}")
+        if id_user is None:
+            targets = [s for subs in self._subscriptions.values() for s in subs]
+        else:
+            targets = list(self._subscriptions.get(id_user, ()))
+        for subscription in targets:
+            subscription.push(events)
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+from app import config
+from app.utils.auth import public_keys_age, refresh_public_keys
+
+logger = logging.getLogger("app.utils.health")
+
+
+class ProbeResult(NamedTuple):
+    ok: bool
+    latency_ms: Optional[float]
+    checked_at: float
+    error: Optional[str] = None
+
+
+def probe_dynamodb(messages_table) -> None:
+    messages_table.meta.client.describe_table(TableName=messages_table.name)
+
+
+def probe_cognito(cognito_client) -> None:
+    cognito_client.describe_user_pool(UserPoolId=config.COGNITO_USER_POOL_ID)
+
+
+def probe_jwks(refresh_seconds: float) -> None:
+    """
+    Refetches the JWKS once it is older than `refresh_seconds`, so rotated
+    signing keys are picked up without a restart.
+
+    A failed refresh only fails the probe when no keys were ever fetched: the
+    keys already in memory keep validating tokens in the meantime.
+    """
+    age = public_keys_age()
+    if age is not None and age < refresh_seconds:
+        return
+    try:
+        refresh_public_keys()
+    except Exception:
+        if age is None:
+            raise
+        logger.warning(f"JWKS refresh failed; keeping keys fetched {age:.0f}s ago")
+
+
+class ReadinessMonitor:
+    """
+    Runs dependency probes in the background and keeps their last result.
+
+    Readiness requests only read the cached results, so polling `/health/ready`
+    never triggers downstream calls. Probes run in worker threads, each bounded
+    by a timeout; a probe still stuck from a previous round is reported as
+    failing instead of being started again.
+    """
+
+    def __init__(
+        self,
+        probes: Dict[str, Callable[[], None]],
+        interval: float,
+        timeout: float,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.probes = probes
+        self.interval = interval
+        self.timeout = timeout
+        # Results older than this mean the background loop stopped running.
+        self.stale_after = 3 * interval
+        self._clock = clock
+        self._results: Dict[str, ProbeResult] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def check(self, name: str, timeout: Optional[float] = None) -> ProbeResult:
+        timeout = self.timeout if timeout is None else timeout
+        pending = self._pending.get(name)
+        if pending is not None and not pending.done():
+            result = ProbeResult(
+                False, None, self._clock(), "previous check still running"
+            )
+        else:
+            future = asyncio.ensure_future(asyncio.to_thread(self.probes[name]))
+            self._pending[name] = future
+            start = time.perf_counter()
+            error = None
+            try:
+                # shield: a timed-out probe keeps its thread until it returns.
+                await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+            except asyncio.TimeoutError:
+                error = f"no answer after {timeout} seconds"
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            latency_ms = round((time.perf_counter() - start) * 1000, 2)
+            result = ProbeResult(error is None, latency_ms, self._clock(), error)
+
+        previous = self._results.get(name)
+        if not result.ok and (previous is None or previous.ok):
+            logger.warning(f"Readiness probe {name} failed: {result.error}")
+        elif result.ok and (previous is None or not previous.ok):
+            logger.info(f"Readiness probe {name} passed in {result.latency_ms}ms")
+        self._results[name] = result
+        return result
+
+    async def run_once(self, timeout: Optional[float] = None) -> Dict[str, ProbeResult]:
+        results = await asyncio.gather(
+            *(self.check(name, timeout) for name in self.probes)
+        )
+        return dict(zip(self.probes, results))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Readiness probes failed to run: {e}")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def snapshot(self) -> Tuple[bool, Dict[str, dict]]:
+        """
+        Returns whether every probe passed recently, and per-probe details.
+        """
+        now = self._clock()
+        ready = True
+        checks = {}
+        for name in self.probes:
+            result = self._results.get(name)
+            if result is None:
+                ready = False
+                checks[name] = {"ok": False, "error": "not checked yet"}
+                continue
+            age = now - result.checked_at
+            error = result.error
+            ok = result.ok
+            if ok and age > self.stale_after:
+                ok, error = False, "result is stale"
+            ready = ready and ok
+            checks[name] = {
+                "ok": ok,
+                "latency_ms": result.latency_ms,
+                "age_seconds": round(age, 2),
+                "error": error,
+            }
+        return ready, checks
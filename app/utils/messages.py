@@ -0,0 +1,204 @@
+import uuid
+import time
+import logging
+from datetime import datetime
+from app import config
+from typing import List, Optional, Tuple
+from fastapi import HTTPException
+from app.utils.chatbot import generate_bot_response
+from app.utils.context import ContextStore
+from app.utils.stats import UserStatsStore
+from app.utils.conversations import update_conversation_summary
+from app.utils.dynamo import batch_delete_items
+from app.models.messages import BatchDeleteResponse, BatchDeleteResult
+from collections import Counter
+
+logger = logging.getLogger("app.utils.messages")
+
+
+def new_message_item(
+    id_user: str, content: str, is_bot: bool, id_conversation: Optional[str] = None
+) -> dict:
+    """
+    Builds a messages table item.
+
+    Args:
+        id_user (str): Owner of the message (Cognito `sub`).
+        content (str): Message text.
+        is_bot (bool): Whether the message was produced by the bot.
+        id_conversation (Optional[str]): Conversation the message belongs to.
+            Messages without one live only in the user's default stream and
+            are left out of the sparse `id_conversation-timestamp-index`.
+
+    When `MESSAGE_RETENTION_DAYS` is set, the item carries an `expires_at`
+    epoch timestamp that the table's TTL uses to expire it.
+
+    Returns:
+        dict: The item, ready for `put_item`.
+    """
+    item = {
+        "id_message": str(uuid.uuid4()),
+        "id_user": id_user,
+        "content": content,
+        "timestamp": datetime.utcnow().isoformat(),
+        "is_bot": is_bot,
+    }
+    if id_conversation:
+        item["id_conversation"] = id_conversation
+    if config.MESSAGE_RETENTION_DAYS > 0:
+        item["expires_at"] = int(time.time()) + config.MESSAGE_RETENTION_DAYS * 86400
+    return item
+
+
+def load_recent_messages(messages_table, id_user: str, limit: int) -> List[dict]:
+    """
+    Reads the user's `limit` newest messages, oldest first.
+
+    Used to hydrate the conversational context of a user that is not in memory.
+    """
+    response = messages_table.query(
+        IndexName="id_user-timestamp-index",
+        KeyConditionExpression="id_user = :id_user",
+        ExpressionAttributeValues={":id_user": id_user},
+        ScanIndexForward=False,
+        Limit=limit,
+    )
+    return list(reversed(response.get("Items", [])))
+
+
+def store_exchange(
+    messages_table,
+    id_user: str,
+    content: str,
+    id_conversation: Optional[str] = None,
+    context_store: Optional[ContextStore] = None,
+    user_stats_store: Optional[UserStatsStore] = None,
+) -> Tuple[dict, dict]:
+    """
+    Stores a user message, generates the bot reply and stores it as well.
+
+    When a context store is given, the bot sees the user's recent turns (of
+    the same conversation, if any) from memory and both new messages are
+    appended to them, so context costs no table read once the user is loaded.
+
+    Returns:
+        Tuple[dict, dict]: The stored user and bot message items.
+
+    Raises:
+        HTTPException: 500 if either message cannot be stored.
+    """
+    history = []
+    if context_store is not None:
+        try:
+            history = context_store.window(
+                id_user,
+                lambda limit: load_recent_messages(messages_table, id_user, limit),
+                id_conversation,
+            )
+        except Exception as e:
+            logger.warning(f"Could not load conversational context: {e}")
+
+    user_message_item = new_message_item(id_user, content, False, id_conversation)
+
+    try:
+        messages_table.put_item(Item=user_message_item)
+        logger.info(f"User message stored: {user_message_item}")
+    except Exception as e:
+        logger.error(f"Error storing user message: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    if context_store is not None:
+        context_store.append(id_user, user_message_item)
+
+    bot_response_content = generate_bot_response(content, history)
+    bot_message_item = new_message_item(
+        id_user, bot_response_content, True, id_conversation
+    )
+
+    try:
+        messages_table.put_item(Item=bot_message_item)
+        logger.info(f"Bot message stored: {bot_message_item}")
+    except Exception as e:
+        logger.error(f"Error storing bot message: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    if context_store is not None:
+        context_store.append(id_user, bot_message_item)
+    if user_stats_store is not None:
+        user_stats_store.record(
+            id_user,
+            user_delta=1,
+            bot_delta=1,
+            last_activity=bot_message_item["timestamp"],
+        )
+
+    return user_message_item, bot_message_item
+
+
+async def delete_user_messages(
+    messages_table,
+    conversations_table,
+    context_store: ContextStore,
+    user_stats_store: UserStatsStore,
+    id_user: str,
+    items: List[dict],
+    missing_ids: List[str] = (),
+) -> BatchDeleteResponse:
+    """
+    Deletes the user-authored messages among `items` with batch writes.
+
+    Bot messages are never deleted, the same rule as the single-message
+    delete. The context store and the conversation summaries are updated for
+    the messages actually deleted.
+
+    Args:
+        items (List[dict]): Message items with at least `id_message`,
+            `is_bot` and `id_conversation` (when set).
+        missing_ids (List[str]): Requested ids that do not exist; reported
+            as `not_found`.
+
+    Returns:
+        BatchDeleteResponse: Per-id outcome: `deleted`, `bot_message`,
+        `not_found` or `failed`.
+    """
+    results = [
+        BatchDeleteResult(id_message=id_message, status="not_found")
+        for id_message in missing_ids
+    ]
+    deletable = []
+    for item in items:
+        if item.get("is_bot", False):
+            results.append(
+                BatchDeleteResult(id_message=item["id_message"], status="bot_message")
+            )
+        else:
+            deletable.append(item)
+
+    failed_keys = await batch_delete_items(
+        messages_table,
+        [{"id_message": item["id_message"], "id_user": id_user} for item in deletable],
+        concurrency=config.DYNAMO_BATCH_CONCURRENCY,
+    )
+    failed_ids = {key["id_message"] for key in failed_keys}
+    deleted = [item for item in deletable if item["id_message"] not in failed_ids]
+    results.extend(
+        BatchDeleteResult(
+            id_message=item["id_message"],
+            status="failed" if item["id_message"] in failed_ids else "deleted",
+        )
+        for item in deletable
+    )
+
+    context_store.remove(id_user, [item["id_message"] for item in deleted])
+    per_conversation = Counter(
+        item["id_conversation"] for item in deleted if item.get("id_conversation")
+    )
+    for id_conversation, count in per_conversation.items():
+        update_conversation_summary(
+            conversations_table, id_user, id_conversation, count_delta=-count
+        )
+    if deleted:
+        user_stats_store.record(id_user, user_delta=-len(deleted))
+
+    logger.info(f"Deleted {len(deleted)} messages of user {id_user}")
+    return BatchDeleteResponse(deleted=len(deleted), results=results)
@@ -0,0 +1,265 @@
+import asyncio
+import csv
+import json
+import logging
+import random
+from typing import AsyncIterator, Iterable, Iterator, Optional, Tuple, Union
+
+from botocore.exceptions import ClientError
+from pydantic import ValidationError
+
+from app import config
+from app.models.users import UserCreate
+
+logger = logging.getLogger("app.utils.provisioning")
+
+THROTTLING_ERROR_CODES = {"TooManyRequestsException", "ThrottlingException"}
+
+
+def create_cognito_user(cognito_client, user: UserCreate) -> None:
+    """
+    Creates a confirmed Cognito user with a permanent password.
+
+    Raises:
+        ClientError: Errors from Cognito are passed through.
+    """
+    cognito_client.admin_create_user(
+        UserPoolId=config.COGNITO_USER_POOL_ID,
+        Username=user.email,
+        UserAttributes=[
+            {"Name": "email", "Value": user.email},
+            {"Name": "email_verified", "Value": "true"},
+        ],
+        TemporaryPassword=user.password,
+        MessageAction="SUPPRESS",
+    )
+    logger.info(f"User {user.email} created successfully in Cognito.")
+
+    cognito_client.admin_set_user_password(
+        UserPoolId=config.COGNITO_USER_POOL_ID,
+        Username=user.email,
+        Password=user.password,
+        Permanent=True,
+    )
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that adapts to throttling (additive increase,
+    multiplicative decrease).
+
+    The limit starts at `max_concurrency`, is halved whenever a call is
+    throttled and grows by one after `limit` consecutive successes.
+    """
+
+    def __init__(self, max_concurrency: int, min_concurrency: int = 1):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = max_concurrency
+        self._in_flight = 0
+        self._successes = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+
+    async def release(self) -> None:
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self) -> None:
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.max_concurrency:
+            self.limit += 1
+            self._successes = 0
+
+    def on_throttle(self) -> None:
+        self._successes = 0
+        self.limit = max(self.min_concurrency, self.limit // 2)
+        logger.warning(f"Cognito throttling, concurrency lowered to {self.limit}")
+
+
+def parse_records(
+    lines: Iterable[str], fmt: str
+) -> Iterator[Tuple[int, Union[dict, Exception]]]:
+    """
+    Parses CSV (with an `email,password` header) or NDJSON lines. CSV cells
+    are stripped of surrounding whitespace.
+
+    Yields:
+        Tuple[int, Union[dict, Exception]]: The 1-based line number and the
+        record, or the parsing error of that line. Blank lines are skipped.
+    """
+    header = None
+    line_number = 0
+    for line in lines:
+        line_number += 1
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            if fmt == "csv":
+                row = [value.strip() for value in next(csv.reader([line]))]
+                if header is None:
+                    header = [column.lower() for column in row]
+                    continue
+                yield line_number, dict(zip(header, row))
+            else:
+                yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+
+
+async def provision_user(
+    cognito_client,
+    record: dict,
+    limiter: AdaptiveLimiter,
+    max_attempts: int = 6,
+    backoff: float = 0.2,
+) -> dict:
+    """
+    Validates one record with `UserCreate` and creates the user.
+
+    Throttled calls are retried with jittered exponential backoff. An
+    existing user counts as already provisioned; one left half-created by an
+    interrupted run (password not yet permanent) is completed.
+
+    Returns:
+        dict: `email`, `status` (`created`, `exists`, `invalid` or `failed`)
+        and, for failures, `detail`.
+    """
+    try:
+        user = UserCreate.model_validate(record)
+    except ValidationError as e:
+        return {
+            "email": record.get("email") if isinstance(record, dict) else None,
+            "status": "invalid",
+            "detail": "; ".join(error["msg"] for error in e.errors()),
+        }
+
+    for attempt in range(max_attempts):
+        try:
+            try:
+                await asyncio.to_thread(create_cognito_user, cognito_client, user)
+                status = "created"
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "UsernameExistsException":
+                    raise
+                status = await asyncio.to_thread(
+                    _complete_existing_user, cognito_client, user
+                )
+            limiter.on_success()
+            return {"email": user.email, "status": status}
+        except ClientError as e:
+            error = e.response["Error"]
+            if error["Code"] not in THROTTLING_ERROR_CODES:
+                return {
+                    "email": user.email,
+                    "status": "failed",
+                    "detail": error.get("Message", error["Code"]),
+                }
+            limiter.on_throttle()
+            if attempt < max_attempts - 1:
+                await asyncio.sleep(backoff * 2**attempt * (0.5 + random.random()))
+        except Exception as e:
+            logger.exception(f"Unexpected error provisioning {user.email}")
+            return {"email": user.email, "status": "failed", "detail": str(e)}
+
+    return {"email": user.email, "status": "failed", "detail": "Throttled"}
+
+
+def _complete_existing_user(cognito_client, user: UserCreate) -> str:
+    response = cognito_client.admin_get_user(
+        UserPoolId=config.COGNITO_USER_POOL_ID, Username=user.email
+    )
+    if response.get("UserStatus") != "FORCE_CHANGE_PASSWORD":
+        return "exists"
+    cognito_client.admin_set_user_password(
+        UserPoolId=config.COGNITO_USER_POOL_ID,
+        Username=user.email,
+        Password=user.password,
+        Permanent=True,
+    )
+    return "created"
+
+
+def _normalized_email(record) -> Optional[str]:
+    """
+    The email as `UserCreate` stores it (domain lowercased), which is the form
+    written to the results, or None for an invalid record.
+    """
+    if not isinstance(record, dict):
+        return None
+    try:
+        return UserCreate.model_validate(record).email
+    except ValidationError:
+        return None
+
+
+async def provision_users(
+    cognito_client,
+    records: Iterable[Tuple[int, Union[dict, Exception]]],
+    max_concurrency: int,
+    skip_emails: Optional[set] = None,
+) -> AsyncIterator[dict]:
+    """
+    Provisions users with bounded, adaptive concurrency.
+
+    Results are yielded as soon as each user is done, so they are not in
+    input order; each carries its `line`. Producing stops while results are
+    not consumed, which keeps memory bounded for large inputs.
+
+    Args:
+        records: Output of `parse_records`.
+        max_concurrency (int): Upper bound of Cognito calls in flight.
+        skip_emails (Optional[set]): Emails already provisioned by a previous
+            run; their records are skipped without any call.
+    """
+    limiter = AdaptiveLimiter(max_concurrency)
+    results = asyncio.Queue(maxsize=max_concurrency)
+    done = object()
+
+    async def run_one(line_number, record):
+        try:
+            if isinstance(record, Exception):
+                result = {"email": None, "status": "invalid", "detail": str(record)}
+            else:
+                result = await provision_user(cognito_client, record, limiter)
+            await results.put({"line": line_number, **result})
+        finally:
+            await limiter.release()
+
+    async def produce():
+        tasks = set()
+        try:
+            for line_number, record in records:
+                if skip_emails and _normalized_email(record) in skip_emails:
+                    continue
+                await limiter.acquire()
+                task = asyncio.create_task(run_one(line_number, record))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        except BaseException as e:
+            for task in tasks:
+                task.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            await results.put(e)
+            return
+        await results.put(done)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            result = await results.get()
+            if result is done:
+                break
+            if isinstance(result, BaseException):
+                raise result
+            yield result
+    finally:
+        producer.cancel()
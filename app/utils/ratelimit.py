@@ -0,0 +1,26 @@
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket allowing `rate` units per second with bursts of one second.
+    """
+
+    def __init__(self, rate: float, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = rate
+        self._updated = clock()
+
+    def acquire(self, units: float = 1) -> None:
+        while True:
+            now = self._clock()
+            self._tokens = min(
+                self.rate, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= min(units, self.rate):
+                self._tokens -= units
+                return
+            self._sleep((min(units, self.rate) - self._tokens) / self.rate)
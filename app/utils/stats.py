@@ -0,0 +1,78 @@
+import logging
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger("app.utils.stats")
+
+
+class UserStatsStore:
+    """
+    Per-user message counters kept in the stats table.
+
+    Writers apply atomic `ADD` updates, so counters stay correct across
+    workers. Reads are served from a short-lived local cache, which every
+    local update refreshes with the values DynamoDB returns, so reading the
+    stats of an active user rarely costs a table read.
+    """
+
+    def __init__(self, table, cache_seconds: float, clock=time.monotonic):
+        self.table = table
+        self.cache_seconds = cache_seconds
+        self._clock = clock
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        id_user: str,
+        user_delta: int = 0,
+        bot_delta: int = 0,
+        last_activity: Optional[str] = None,
+    ) -> None:
+        """
+        Applies message count changes for a user.
+
+        Failures are logged and not raised: the messages themselves are
+        already written, and the backfill job can rebuild the counters.
+        """
+        update_expression = "ADD user_messages :user_delta, bot_messages :bot_delta"
+        values = {":user_delta": user_delta, ":bot_delta": bot_delta}
+        if last_activity is not None:
+            update_expression += " SET last_activity = :last_activity"
+            values[":last_activity"] = last_activity
+
+        try:
+            response = self.table.update_item(
+                Key={"id_user": id_user},
+                UpdateExpression=update_expression,
+                ExpressionAttributeValues=values,
+                ReturnValues="ALL_NEW",
+            )
+        except Exception as e:
+            logger.warning(f"Could not update message stats of user {id_user}: {e}")
+            self.invalidate(id_user)
+            return
+        self._store(id_user, response.get("Attributes", {}))
+
+    def get(self, id_user: str) -> dict:
+        """
+        Returns the user's counters, from the cache when fresh enough.
+        """
+        with self._lock:
+            cached = self._cache.get(id_user)
+        if cached is not None and self._clock() - cached[0] < self.cache_seconds:
+            return cached[1]
+
+        response = self.table.get_item(Key={"id_user": id_user})
+        item = response.get("Item") or {"id_user": id_user}
+        self._store(id_user, item)
+        return item
+
+    def invalidate(self, id_user: str) -> None:
+        with self._lock:
+            self._cache.pop(id_user, None)
+
+    def _store(self, id_user: str, item: dict) -> None:
+        with self._lock:
+            self._cache[id_user] = (self._clock(), item)
@@ -0,0 +1,75 @@
+"""
+Measures the cost of turning one page of DynamoDB message items into JSON.
+
+Compares the previous path (build `MessageTableItem` objects, wrap them in an
+untyped list, let FastAPI re-encode through `jsonable_encoder` + `json.dumps`)
+with the single-pass path used by `list_messages` today.
+
+Usage:
+    python -m benchmarks.bench_serialization [--page-size 100] [--rounds 2000]
+"""
+
+import argparse
+import json
+import timeit
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models.messages import MessageTableItem, MessageTableList
+from app.responses import ORJSONResponse, model_response
+
+
+def build_page(page_size: int) -> list:
+    start = datetime(2024, 10, 7, 7, 33, 21)
+    return [
+        {
+            "id_message": str(uuid.uuid4()),
+            "id_user": "bench-user",
+            "content": f"Message number {i} " * 4,
+            "timestamp": (start + timedelta(seconds=i)).isoformat(),
+            "is_bot": bool(i % 2),
+        }
+        for i in range(page_size)
+    ]
+
+
+def legacy_path(items: list) -> bytes:
+    messages = [MessageTableItem(**item) for item in items]
+    payload = jsonable_encoder({"messages": messages})
+    return json.dumps(
+        payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def encoder_orjson_path(items: list) -> bytes:
+    messages = [MessageTableItem(**item) for item in items]
+    return ORJSONResponse(jsonable_encoder({"messages": messages})).body
+
+
+def single_pass_path(items: list) -> bytes:
+    return model_response(MessageTableList.model_validate({"messages": items})).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    items = build_page(args.page_size)
+    assert json.loads(legacy_path(items)) == json.loads(single_pass_path(items))
+
+    print(f"page size: {args.page_size} messages, rounds: {args.rounds}")
+    for name, func in (
+        ("legacy (jsonable_encoder + json)", legacy_path),
+        ("jsonable_encoder + orjson", encoder_orjson_path),
+        ("single pass (model_validate + dump_json)", single_pass_path),
+    ):
+        best = min(timeit.repeat(lambda: func(items), number=args.rounds, repeat=5))
+        print(f"{name:<45} {best / args.rounds * 1e6:9.1f} us/page")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Measures application cold start.
+
+Reports the time to import `app.main` in a fresh interpreter and the time from
+spawning a uvicorn process until it answers its first `GET /health`, which
+includes the lifespan (client construction and warm-up).
+
+Requires the same environment variables as the application (see `.env.example`).
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--port 8765]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def measure_import() -> float:
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_SNIPPET])
+    return float(output.decode().strip())
+
+
+def measure_first_request(port: int, timeout: float = 30.0) -> float:
+    url = f"http://127.0.0.1:{port}/health"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ]
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"No response from {url} after {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    first_requests = [measure_first_request(args.port) for _ in range(args.runs)]
+
+    print(f"runs: {args.runs}")
+    print(f"import app.main        median {statistics.median(imports) * 1e3:8.1f} ms")
+    print(
+        f"time to first request  median {statistics.median(first_requests) * 1e3:8.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
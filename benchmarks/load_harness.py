@@ -0,0 +1,66 @@
+"""
+Closed-loop HTTP load generator.
+
+Keeps `--connections` requests in flight against one URL for `--duration`
+seconds and reports throughput and latency percentiles.
+
+Usage:
+    python -m benchmarks.load_harness http://127.0.0.1:8000/health \\
+        [--connections 64] [--duration 10]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def worker(client: httpx.AsyncClient, url: str, deadline: float, stats: dict):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get(url)
+            ok = response.status_code < 500
+        except httpx.HTTPError:
+            ok = False
+        stats["latencies"].append(time.perf_counter() - start)
+        stats["ok" if ok else "errors"] += 1
+
+
+async def run(url: str, connections: int, duration: float) -> dict:
+    stats = {"latencies": [], "ok": 0, "errors": 0}
+    limits = httpx.Limits(
+        max_connections=connections, max_keepalive_connections=connections
+    )
+    async with httpx.AsyncClient(limits=limits, timeout=10) as client:
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(
+            *(worker(client, url, deadline, stats) for _ in range(connections))
+        )
+        stats["elapsed"] = time.perf_counter() - start
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("url")
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    stats = asyncio.run(run(args.url, args.connections, args.duration))
+    latencies = sorted(stats["latencies"])
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"requests: {stats['ok']} ok, {stats['errors']} errors")
+    print(f"throughput: {stats['ok'] / stats['elapsed']:.0f} req/s")
+    print(
+        f"latency: p50 {percentiles[49] * 1e3:.1f} ms, "
+        f"p99 {percentiles[98] * 1e3:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import gzip
+import json
+from decimal import Decimal
+from unittest.mock import MagicMock
+from app import config
+from app.jobs.compact import CompactionState, run
+from app.utils.ratelimit import RateLimiter
+from app.utils.messages import new_message_item
+
+CUTOFF = "2024-06-01T00:00:00"
+
+
+def old_message(id_message, timestamp):
+    return {
+        "id_message": id_message,
+        "id_user": "user1",
+        "content": "Old message",
+        "timestamp": timestamp,
+        "is_bot": False,
+        "expires_at": Decimal("1717200000"),
+    }
+
+
+def unlimited():
+    return RateLimiter(rate=1e9, sleep=lambda seconds: None)
+
+
+def test_new_message_item_sets_ttl(monkeypatch):
+    monkeypatch.setattr(config, "MESSAGE_RETENTION_DAYS", 30)
+    item = new_message_item("user1", "Hello", False)
+    assert item["expires_at"] > 0
+
+    monkeypatch.setattr(config, "MESSAGE_RETENTION_DAYS", 0)
+    assert "expires_at" not in new_message_item("user1", "Hello", False)
+
+
+def test_run_archives_then_deletes_pages(tmp_path):
+    messages_table = MagicMock()
+    messages_table.query.side_effect = [
+        {
+            "Items": [old_message("m1", "2024-01-01T00:00:00.000001")],
+            "LastEvaluatedKey": {"id_message": "m1"},
+        },
+        {"Items": [old_message("m2", "2024-01-02T00:00:00.000001")]},
+    ]
+    batch = messages_table.batch_writer.return_value.__enter__.return_value
+    state_file = tmp_path / "state.json"
+    state = CompactionState(str(state_file), CUTOFF)
+    user_stats_store = MagicMock()
+
+    total = run(
+        messages_table,
+        ["user1"],
+        state,
+        str(tmp_path / "archive"),
+        1,
+        unlimited(),
+        user_stats_store=user_stats_store,
+    )
+
+    assert total == 2
+    assert user_stats_store.record.call_count == 2
+    user_stats_store.record.assert_called_with("user1", user_delta=-1, bot_delta=0)
+    archives = sorted((tmp_path / "archive" / "user1").iterdir())
+    assert len(archives) == 2
+    with gzip.open(archives[0], "rt") as f:
+        assert json.loads(f.readline())["expires_at"] == 1717200000
+    assert batch.delete_item.call_count == 2
+    query = messages_table.query.call_args_list[0].kwargs
+    assert query["ExpressionAttributeValues"][":cutoff"] == CUTOFF
+    assert json.loads(state_file.read_text()) == {
+        "cutoff": CUTOFF,
+        "completed_users": ["user1"],
+    }
+
+
+def test_run_resumes_from_state_file(tmp_path):
+    state_file = tmp_path / "state.json"
+    state_file.write_text(
+        json.dumps({"cutoff": "2024-01-01T00:00:00", "completed_users": ["user1"]})
+    )
+    messages_table = MagicMock()
+    messages_table.query.return_value = {"Items": []}
+
+    state = CompactionState(str(state_file), CUTOFF)
+    run(messages_table, ["user1", "user2"], state, str(tmp_path), 100, unlimited())
+
+    assert state.cutoff == "2024-01-01T00:00:00"
+    messages_table.query.assert_called_once()
+    assert (
+        messages_table.query.call_args.kwargs["ExpressionAttributeValues"][":id_user"]
+        == "user2"
+    )
+
+
+def test_rate_limiter_waits_for_tokens():
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    limiter = RateLimiter(rate=10, clock=lambda: now[0], sleep=sleep)
+    limiter.acquire(10)
+    limiter.acquire(5)
+
+    assert sleeps == [0.5]
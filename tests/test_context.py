@@ -0,0 +1,163 @@
+import asyncio
+from unittest.mock import MagicMock
+from app.utils.chatbot import generate_bot_response
+from app.utils.context import ContextStore, Turn, TURN_OVERHEAD_BYTES
+from app.utils.events import (
+    EventHub,
+    InMemoryBroker,
+    conversation_deleted,
+    message_created,
+    message_deleted,
+    message_updated,
+)
+
+
+def message(id_message, content="text", is_bot=False, id_conversation=None):
+    item = {"id_message": id_message, "content": content, "is_bot": is_bot}
+    if id_conversation:
+        item["id_conversation"] = id_conversation
+    return item
+
+
+def test_window_hydrates_once_on_miss():
+    store = ContextStore(max_turns=3, max_bytes=1024 * 1024)
+    loader = MagicMock(return_value=[message("m1"), message("m2")])
+
+    assert [turn.id_message for turn in store.window("user", loader)] == ["m1", "m2"]
+    assert [turn.id_message for turn in store.window("user", loader)] == ["m1", "m2"]
+    loader.assert_called_once_with(3)
+
+
+def test_append_keeps_last_turns_only():
+    store = ContextStore(max_turns=2, max_bytes=1024 * 1024)
+    store.window("user", lambda limit: [])
+
+    for id_message in ("m1", "m2", "m3"):
+        store.append("user", message(id_message, content="abc"))
+
+    assert [turn.id_message for turn in store.window("user", None)] == ["m2", "m3"]
+    assert store.total_bytes == 2 * (3 + TURN_OVERHEAD_BYTES)
+
+
+def test_append_ignores_users_not_loaded():
+    store = ContextStore(max_turns=2, max_bytes=1024 * 1024)
+    store.append("user", message("m1"))
+    assert "user" not in store
+    assert store.total_bytes == 0
+
+
+def test_window_filters_by_conversation():
+    store = ContextStore(max_turns=5, max_bytes=1024 * 1024)
+    store.window(
+        "user", lambda limit: [message("m1", id_conversation="c1"), message("m2")]
+    )
+    turns = store.window("user", None, id_conversation="c1")
+    assert [turn.id_message for turn in turns] == ["m1"]
+
+
+def test_edit_and_remove_keep_accounting():
+    store = ContextStore(max_turns=5, max_bytes=1024 * 1024)
+    store.window(
+        "user",
+        lambda limit: [
+            message("m1", content="a"),
+            message("m2", content="b", id_conversation="c1"),
+            message("m3", content="c"),
+        ],
+    )
+
+    store.edit("user", "m1", "longer")
+    store.remove("user", ["m3"])
+    store.remove_conversation("user", "c1")
+
+    assert store.window("user", None) == [Turn("m1", "longer", False, None)]
+    assert store.total_bytes == len("longer") + TURN_OVERHEAD_BYTES
+
+
+def test_least_recently_used_users_are_evicted():
+    turn_bytes = 1 + TURN_OVERHEAD_BYTES
+    store = ContextStore(max_turns=1, max_bytes=2 * turn_bytes)
+    for user in ("a", "b"):
+        store.window(user, lambda limit: [message(f"{user}1", content="x")])
+
+    store.window("a", None)
+    store.window("c", lambda limit: [message("c1", content="x")])
+
+    assert "a" in store
+    assert "b" not in store
+    assert "c" in store
+    assert store.total_bytes == 2 * turn_bytes
+
+
+def test_events_from_other_workers_update_buffers():
+    # Two hubs on one broker stand in for two workers behind a shared broker.
+    broker = InMemoryBroker()
+    worker_a = ContextStore(max_turns=5, max_bytes=1024 * 1024)
+    worker_b = ContextStore(max_turns=5, max_bytes=1024 * 1024)
+    loader = lambda limit: [message("m1", id_conversation="c1"), message("m2")]
+    worker_a.window("user", loader)
+    worker_b.window("user", loader)
+
+    async def run():
+        hubs = [EventHub(broker, max_pending=10) for _ in range(2)]
+        for hub, store in zip(hubs, (worker_a, worker_b)):
+            await hub.start()
+            hub.add_listener(store.apply_events)
+        # Worker B handles the requests and updates its own store first.
+        worker_b.edit("user", "m2", "edited")
+        worker_b.append("user", message("m3"))
+        await hubs[1].publish(
+            "user",
+            [
+                message_updated("m2", "edited"),
+                message_created(message("m3")),
+                conversation_deleted("c1"),
+            ],
+        )
+        await hubs[1].publish("user", [message_deleted("m3")])
+
+    asyncio.run(run())
+
+    for store in (worker_a, worker_b):
+        turns = store.window("user", None)
+        assert [(turn.id_message, turn.content) for turn in turns] == [("m2", "edited")]
+
+
+def test_resync_invalidates_buffers():
+    store = ContextStore(max_turns=5, max_bytes=1024 * 1024)
+    store.window("user", lambda limit: [message("m1")])
+    store.window("other", lambda limit: [message("m2")])
+
+    store.apply_events("user", [{"type": "resync"}])
+    assert "user" not in store and "other" in store
+
+    store.apply_events(None, [{"type": "resync"}])
+    assert "other" not in store
+    assert store.total_bytes == 0
+
+
+def test_buffers_are_reloaded_after_max_age():
+    now = [0.0]
+    store = ContextStore(
+        max_turns=5, max_bytes=1024 * 1024, max_age=60, clock=lambda: now[0]
+    )
+    loader = MagicMock(return_value=[message("m1")])
+
+    store.window("user", loader)
+    now[0] = 30
+    store.window("user", loader)
+    assert loader.call_count == 1
+
+    now[0] = 91
+    store.window("user", loader)
+    assert loader.call_count == 2
+
+
+def test_bot_uses_history_for_follow_ups():
+    history = [Turn("m1", "What's the weather like?", False)]
+    assert generate_bot_response("Tell me more", history) == (
+        "The weather is sunny with a chance of rainbows!"
+    )
+    assert generate_bot_response("Tell me more") == (
+        "I'm sorry, I didn't quite catch that. Could you please elaborate?"
+    )
@@ -0,0 +1,228 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.main import app
+from app.auth import get_current_user
+from app.dependencies import (
+    get_messages_table,
+    get_conversations_table,
+    get_context_store,
+    get_user_stats_store,
+    get_event_hub,
+)
+from app.utils.context import ContextStore
+from app.utils.events import conversation_deleted
+from app.models.users import User
+import uuid
+
+client = TestClient(app)
+
+test_user = User(
+    sub="test-user-id",
+    username="testuser",
+    iss="https://cognito-idp.us-east-1.amazonaws.com/us-east-1_example",
+    client_id="test-client-id",
+    token_use="access",
+    scope="aws.cognito.signin.user.admin",
+    exp=9999999999,
+    iat=0,
+    jti=str(uuid.uuid4()),
+)
+
+conversation_item = {
+    "id_conversation": "conversation1",
+    "id_user": test_user.sub,
+    "title": "Weather",
+    "created_at": "2024-10-07T07:30:00.000000",
+    "updated_at": "2024-10-07T07:35:21.023112",
+    "last_message": "The weather is sunny with a chance of rainbows!",
+    "last_message_at": "2024-10-07T07:35:21.023112",
+    "message_count": 2,
+}
+
+
+async def mock_get_current_user():
+    return test_user
+
+
+mock_messages_table = MagicMock()
+mock_conversations_table = MagicMock()
+mock_user_stats_store = MagicMock()
+mock_event_hub = MagicMock()
+
+
+@pytest.fixture(autouse=True)
+def override_dependency():
+    mock_messages_table.reset_mock(return_value=True, side_effect=True)
+    mock_conversations_table.reset_mock(return_value=True, side_effect=True)
+    context_store = ContextStore(max_turns=10, max_bytes=1024 * 1024)
+    app.dependency_overrides[get_current_user] = mock_get_current_user
+    app.dependency_overrides[get_context_store] = lambda: context_store
+    app.dependency_overrides[get_user_stats_store] = lambda: mock_user_stats_store
+    app.dependency_overrides[get_messages_table] = lambda: mock_messages_table
+    app.dependency_overrides[get_conversations_table] = lambda: mock_conversations_table
+    mock_event_hub.publish = AsyncMock()
+    app.dependency_overrides[get_event_hub] = lambda: mock_event_hub
+    yield
+    app.dependency_overrides.clear()
+
+
+def test_create_conversation():
+    response = client.post("/conversations/", json={"title": "Weather"})
+    assert response.status_code == 201
+    data = response.json()
+    assert data["title"] == "Weather"
+    assert data["id_user"] == test_user.sub
+    assert data["message_count"] == 0
+    stored = mock_conversations_table.put_item.call_args.kwargs["Item"]
+    assert stored["id_conversation"] == data["id_conversation"]
+
+
+def test_list_conversations_reads_only_conversation_rows():
+    mock_conversations_table.query.return_value = {"Items": [conversation_item]}
+
+    response = client.get("/conversations/")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["conversations"][0]["last_message"] == conversation_item["last_message"]
+    assert data["conversations"][0]["message_count"] == 2
+    mock_messages_table.query.assert_not_called()
+
+
+def test_list_conversations_pages_with_before():
+    mock_conversations_table.query.return_value = {"Items": []}
+
+    response = client.get(
+        "/conversations/", params={"before": conversation_item["updated_at"]}
+    )
+    assert response.status_code == 200
+    query = mock_conversations_table.query.call_args.kwargs
+    assert query["KeyConditionExpression"] == (
+        "id_user = :id_user AND updated_at < :before"
+    )
+    assert query["ExpressionAttributeValues"] == {
+        ":id_user": test_user.sub,
+        ":before": conversation_item["updated_at"],
+    }
+
+
+def test_list_conversation_messages_uses_conversation_index():
+    mock_conversations_table.get_item.return_value = {"Item": conversation_item}
+    mock_messages_table.query.return_value = {
+        "Items": [
+            {
+                "id_message": "message1",
+                "id_user": test_user.sub,
+                "id_conversation": "conversation1",
+                "content": "Weather?",
+                "timestamp": "2024-10-07T07:33:21.023112",
+                "is_bot": False,
+            }
+        ]
+    }
+
+    response = client.get(
+        "/conversations/conversation1/messages",
+        params={"before": "2024-10-08T00:00:00"},
+    )
+    assert response.status_code == 200
+    assert response.json()["messages"][0]["id_conversation"] == "conversation1"
+    query = mock_messages_table.query.call_args.kwargs
+    assert query["IndexName"] == "id_conversation-timestamp-index"
+    assert query["ExpressionAttributeValues"] == {
+        ":id_conversation": "conversation1",
+        ":before": "2024-10-08T00:00:00",
+    }
+
+
+def test_list_messages_of_unknown_conversation():
+    mock_conversations_table.get_item.return_value = {}
+
+    response = client.get("/conversations/unknown/messages")
+    assert response.status_code == 404
+    mock_messages_table.query.assert_not_called()
+
+
+def test_send_conversation_message_updates_summary():
+    mock_conversations_table.get_item.return_value = {"Item": conversation_item}
+
+    with patch("app.utils.messages.generate_bot_response") as mock_bot:
+        mock_bot.return_value = "This is a bot response."
+        response = client.post(
+            "/conversations/conversation1/messages", json={"content": "Hello"}
+        )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["user_message"]["id_conversation"] == "conversation1"
+    assert data["bot_response"]["id_conversation"] == "conversation1"
+    update = mock_conversations_table.update_item.call_args.kwargs
+    assert update["ExpressionAttributeValues"][":count_delta"] == 2
+    assert (
+        update["ExpressionAttributeValues"][":last_message"]
+        == "This is a bot response."
+    )
+
+
+def test_delete_conversation_removes_messages():
+    mock_conversations_table.get_item.return_value = {"Item": conversation_item}
+    mock_messages_table.query.side_effect = [
+        {
+            "Items": [{"id_message": "message1", "id_user": test_user.sub}],
+            "LastEvaluatedKey": {"id_message": "message1"},
+        },
+        {"Items": [{"id_message": "message2", "id_user": test_user.sub}]},
+    ]
+    mock_messages_table.name = "Messages"
+    dynamo_client = mock_messages_table.meta.client
+    dynamo_client.batch_write_item.return_value = {"UnprocessedItems": {}}
+
+    response = client.delete("/conversations/conversation1")
+    assert response.status_code == 200
+    assert response.json() == {
+        "id_conversation": "conversation1",
+        "status": "deleted",
+        "deleted_messages": 2,
+    }
+    assert [
+        call.kwargs["RequestItems"]
+        for call in dynamo_client.batch_write_item.call_args_list
+    ] == [
+        {
+            "Messages": [
+                {
+                    "DeleteRequest": {
+                        "Key": {"id_message": message, "id_user": test_user.sub}
+                    }
+                }
+            ]
+        }
+        for message in ("message1", "message2")
+    ]
+    mock_conversations_table.delete_item.assert_called_once_with(
+        Key={"id_user": test_user.sub, "id_conversation": "conversation1"}
+    )
+    mock_event_hub.publish.assert_awaited_once_with(
+        test_user.sub, [conversation_deleted("conversation1")]
+    )
+
+
+def test_delete_conversation_counts_only_deleted_messages():
+    mock_user_stats_store.reset_mock()
+    mock_conversations_table.get_item.return_value = {"Item": conversation_item}
+    mock_messages_table.query.return_value = {
+        "Items": [
+            {"id_message": "message1", "id_user": test_user.sub},
+            {"id_message": "message2", "id_user": test_user.sub, "is_bot": True},
+        ]
+    }
+    mock_messages_table.name = "Messages"
+    mock_messages_table.meta.client.batch_write_item.side_effect = ConnectionError(
+        "throttled"
+    )
+
+    response = client.delete("/conversations/conversation1")
+
+    assert response.status_code == 200
+    assert response.json()["deleted_messages"] == 0
+    mock_user_stats_store.record.assert_not_called()
@@ -0,0 +1,126 @@
+import asyncio
+import pstats
+import pytest
+from fastapi.testclient import TestClient
+from app import config
+from app.main import app
+from app.profiling import Profiler, ProfilingMiddleware
+
+client = TestClient(app)
+
+ADMIN_HEADERS = {"X-Admin-Token": "admin-secret"}
+
+
+@pytest.fixture(autouse=True)
+def profiler(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "ADMIN_API_TOKEN", "admin-secret")
+    profiler = app.state.profiler
+    monkeypatch.setattr(profiler, "profiles_dir", str(tmp_path))
+    monkeypatch.setattr(profiler, "max_profiles", 2)
+    yield profiler
+    profiler.configure(sample_rate=0, allow_header=False)
+
+
+def test_debug_routes_require_admin_token():
+    assert client.get("/debug/profiles").status_code == 403
+
+
+def test_disabled_profiler_stores_nothing(profiler):
+    assert client.get("/health").status_code == 200
+    assert profiler.list_profiles() == []
+
+
+def test_sampled_requests_are_profiled_and_listed(profiler):
+    response = client.put(
+        "/debug/profiling", json={"sample_rate": 1.0}, headers=ADMIN_HEADERS
+    )
+    assert response.json() == {"sample_rate": 1.0, "allow_header": False}
+
+    for _ in range(3):
+        client.get("/health")
+    client.put("/debug/profiling", json={"sample_rate": 0}, headers=ADMIN_HEADERS)
+
+    # Four requests were sampled (three GETs and the PUT disabling sampling);
+    # only the newest two are kept.
+    profiles = client.get("/debug/profiles", headers=ADMIN_HEADERS).json()["profiles"]
+    assert len(profiles) == 2
+    assert "-PUT-debug_profiling-" in profiles[0]["name"]
+    assert "-GET-health-" in profiles[1]["name"]
+
+    download = client.get(
+        f"/debug/profiles/{profiles[-1]['name']}", headers=ADMIN_HEADERS
+    )
+    assert download.status_code == 200
+    stats_file = profiler.profile_path(profiles[-1]["name"])
+    assert pstats.Stats(stats_file).total_calls > 0
+
+
+def test_header_triggers_profile(profiler):
+    profiler.configure(allow_header=True)
+
+    client.get("/health", headers={"X-Profile-Token": "wrong"})
+    assert profiler.list_profiles() == []
+
+    client.get("/health", headers={"X-Profile-Token": "admin-secret"})
+    assert len(profiler.list_profiles()) == 1
+
+
+def test_download_rejects_path_traversal():
+    response = client.get(
+        "/debug/profiles/..%2F..%2Fetc%2Fpasswd", headers=ADMIN_HEADERS
+    )
+    assert response.status_code == 404
+
+
+def test_event_stream_requests_are_not_profiled(profiler):
+    profiler.configure(sample_rate=1.0)
+    scope = {"type": "http", "headers": [(b"accept", b"text/event-stream")]}
+
+    assert profiler.should_profile(scope) is False
+
+
+def _run_long_request(profiler, content_type):
+    """
+    Runs a request that stays open for 0.3s under the middleware and reports
+    whether profiling was still running and stored at 0.15s.
+    """
+    observed = {}
+
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", content_type)],
+            }
+        )
+        await asyncio.sleep(0.15)
+        observed["busy"] = profiler._busy
+        observed["profiles"] = len(profiler.list_profiles())
+        await asyncio.sleep(0.15)
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": "/slow", "headers": []}
+    asyncio.run(ProfilingMiddleware(app, profiler)(scope, None, send))
+    return observed
+
+
+def test_event_stream_response_stops_profiling(tmp_path):
+    profiler = Profiler(str(tmp_path), sample_rate=1.0, max_seconds=60)
+
+    observed = _run_long_request(profiler, b"text/event-stream; charset=utf-8")
+
+    assert observed == {"busy": False, "profiles": 1}
+    assert len(profiler.list_profiles()) == 1
+
+
+def test_profile_is_cut_after_max_seconds(tmp_path):
+    profiler = Profiler(str(tmp_path), sample_rate=1.0, max_seconds=0.05)
+
+    observed = _run_long_request(profiler, b"application/json")
+
+    assert observed == {"busy": False, "profiles": 1}
+    assert len(profiler.list_profiles()) == 1
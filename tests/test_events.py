@@ -0,0 +1,244 @@
+import asyncio
+import signal
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app import config
+from app.main import app, _close_streams_on_exit_signal
+from app.auth import get_current_user
+from app.dependencies import get_event_hub
+from app.utils.events import (
+    Broker,
+    EventHub,
+    InMemoryBroker,
+    Subscription,
+    conversation_deleted,
+    message_created,
+    message_deleted,
+    message_updated,
+)
+
+
+def _message(id_message, content="Hello"):
+    return {"id_message": id_message, "id_user": "user-1", "content": content}
+
+
+def test_subscription_coalesces_pending_events():
+    subscription = Subscription("user-1", max_pending=10)
+    subscription.push(
+        [
+            message_created(_message("m1")),
+            message_updated("m1", "edited"),
+            message_created(_message("m2")),
+            message_deleted("m2"),
+            message_updated("m3", "first"),
+            message_updated("m3", "second"),
+        ]
+    )
+
+    events = asyncio.run(subscription.get(timeout=0))
+    assert events == [
+        message_created(_message("m1", "edited")),
+        message_updated("m3", "second"),
+    ]
+
+
+def test_subscription_overflow_sends_single_resync():
+    subscription = Subscription("user-1", max_pending=3)
+    subscription.push([message_deleted(f"m{i}") for i in range(10)])
+
+    assert asyncio.run(subscription.get(timeout=0)) == [{"type": "resync"}]
+    assert subscription.dropped == 10
+
+    subscription.push([message_deleted("m11")])
+    assert asyncio.run(subscription.get(timeout=0)) == [message_deleted("m11")]
+
+
+def test_subscription_get_times_out_without_events():
+    subscription = Subscription("user-1", max_pending=3)
+    assert asyncio.run(subscription.get(timeout=0.01)) == []
+
+
+def test_hub_delivers_only_to_the_users_subscriptions():
+    async def run():
+        hub = EventHub(InMemoryBroker(), max_pending=10)
+        await hub.start()
+        phone = hub.subscribe("user-1")
+        desktop = hub.subscribe("user-1")
+        other = hub.subscribe("user-2")
+
+        await hub.publish("user-1", [conversation_deleted("c1")])
+
+        assert await phone.get(timeout=0) == [conversation_deleted("c1")]
+        assert await desktop.get(timeout=0) == [conversation_deleted("c1")]
+        assert await other.get(timeout=0.01) == []
+
+        for subscription in (phone, desktop, other):
+            hub.unsubscribe(subscription)
+        assert hub.subscriber_count() == 0
+
+    asyncio.run(run())
+
+
+def test_hub_publish_failure_is_not_raised():
+    broker = InMemoryBroker()
+    broker.publish = AsyncMock(side_effect=ConnectionError("redis down"))
+    hub = EventHub(broker, max_pending=10)
+
+    asyncio.run(hub.publish("user-1", [message_deleted("m1")]))
+
+    broker.publish.assert_awaited_once()
+
+
+STREAM_SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/messages/stream",
+    "raw_path": b"/messages/stream",
+    "root_path": "",
+    "query_string": b"",
+    "headers": [(b"host", b"testserver")],
+    "client": ("testclient", 50000),
+    "server": ("testserver", 80),
+}
+
+
+def test_incomplete_broker_cannot_be_built():
+    class PublishOnlyBroker(Broker):
+        async def publish(self, id_user, events):
+            pass
+
+    with pytest.raises(TypeError):
+        PublishOnlyBroker()
+
+
+def test_hub_close_ends_subscriptions():
+    async def run():
+        hub = EventHub(InMemoryBroker(), max_pending=10)
+        await hub.start()
+        subscription = hub.subscribe("user-1")
+        waiter = asyncio.create_task(subscription.get(timeout=5))
+        await asyncio.sleep(0)
+
+        hub.close()
+
+        assert await asyncio.wait_for(waiter, timeout=1) == []
+        assert subscription.closed
+        assert hub.subscribe("user-1").closed
+
+    asyncio.run(run())
+
+
+def test_exit_signal_closes_hub():
+    hub = MagicMock()
+    received = []
+
+    def server_handler(signum, frame):
+        received.append(signum)
+
+    original = signal.getsignal(signal.SIGTERM)
+
+    async def run():
+        signal.signal(signal.SIGTERM, server_handler)
+        _close_streams_on_exit_signal(hub)
+        signal.getsignal(signal.SIGTERM)(signal.SIGTERM, None)
+        await asyncio.sleep(0)
+
+    try:
+        asyncio.run(run())
+    finally:
+        signal.signal(signal.SIGTERM, original)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    hub.close.assert_called_once_with()
+    assert received == [signal.SIGTERM]
+
+
+@pytest.fixture
+def stream_user():
+    from tests.test_messages import mock_get_current_user, test_user
+
+    app.dependency_overrides[get_current_user] = mock_get_current_user
+    yield test_user
+    app.dependency_overrides.clear()
+
+
+def test_stream_sends_published_events(stream_user, monkeypatch):
+    monkeypatch.setattr(config, "EVENTS_HEARTBEAT_SECONDS", 0.05)
+    hub = EventHub(InMemoryBroker(), max_pending=10)
+    app.dependency_overrides[get_event_hub] = lambda: hub
+
+    # TestClient buffers streaming bodies, so drive the ASGI app directly.
+    async def run():
+        await hub.start()
+        chunks = []
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                assert message["status"] == 200
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        request = asyncio.create_task(app(STREAM_SCOPE, receive, send))
+        while hub.subscriber_count(stream_user.sub) == 0:
+            await asyncio.sleep(0.01)
+
+        await hub.publish(stream_user.sub, [message_deleted("m1")])
+        await hub.publish("someone-else", [message_deleted("m2")])
+        while not any(b"message.deleted" in chunk for chunk in chunks):
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+
+        disconnected.set()
+        await asyncio.wait_for(request, timeout=2)
+        return b"".join(chunks).decode()
+
+    body = asyncio.run(run())
+    assert (
+        'event: message.deleted\ndata: {"type": "message.deleted", "id_message": "m1"}\n\n'
+        in body
+    )
+    assert "m2" not in body
+    assert ": keep-alive\n\n" in body
+    assert hub.subscriber_count() == 0
+
+
+def test_stream_ends_when_hub_is_closed(stream_user):
+    hub = EventHub(InMemoryBroker(), max_pending=10)
+    app.dependency_overrides[get_event_hub] = lambda: hub
+
+    async def run():
+        await hub.start()
+        messages = []
+        client_gone = asyncio.Event()
+
+        async def receive():
+            await client_gone.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+
+        request = asyncio.create_task(app(STREAM_SCOPE, receive, send))
+        while hub.subscriber_count(stream_user.sub) == 0:
+            await asyncio.sleep(0.01)
+
+        hub.close()
+        # The response completes although the client never disconnects.
+        await asyncio.wait_for(request, timeout=2)
+        return messages
+
+    messages = asyncio.run(run())
+    assert messages[-1] == {
+        "type": "http.response.body",
+        "body": b"",
+        "more_body": False,
+    }
+    assert hub.subscriber_count() == 0
@@ -1,10 +1,142 @@
+import asyncio
+import threading
+import pytest
 from fastapi.testclient import TestClient
+from unittest.mock import patch
 from app.main import app
+from app.utils.health import ReadinessMonitor, probe_jwks
 
 client = TestClient(app)
 
 
+@pytest.fixture
+def readiness():
+    yield
+    app.state.readiness = None
+
+
+def _ok():
+    pass
+
+
+def _fail():
+    raise RuntimeError("table not found")
+
+
 def test_health_check():
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "OK"}
+
+
+def test_liveness_check():
+    response = client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "OK"}
+
+
+def test_readiness_without_monitor(readiness):
+    app.state.readiness = None
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json() == {"status": "not_ready", "checks": {}}
+
+
+def test_readiness_serves_cached_results(readiness):
+    calls = []
+
+    def counting_probe():
+        calls.append(1)
+
+    monitor = ReadinessMonitor(
+        {"dynamodb": counting_probe, "jwks": _ok}, interval=10, timeout=1
+    )
+    asyncio.run(monitor.run_once())
+    app.state.readiness = monitor
+
+    for _ in range(5):
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+
+    assert len(calls) == 1
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["checks"]["dynamodb"]["ok"] is True
+    assert body["checks"]["dynamodb"]["latency_ms"] >= 0
+
+
+def test_readiness_reports_failing_probe(readiness):
+    monitor = ReadinessMonitor({"dynamodb": _fail, "jwks": _ok}, interval=10, timeout=1)
+    asyncio.run(monitor.run_once())
+    app.state.readiness = monitor
+
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    checks = response.json()["checks"]
+    assert checks["dynamodb"]["ok"] is False
+    assert checks["dynamodb"]["error"] == "table not found"
+    assert checks["jwks"]["ok"] is True
+
+
+def test_readiness_not_ready_before_first_check_and_when_stale():
+    now = [1000.0]
+    monitor = ReadinessMonitor(
+        {"dynamodb": _ok}, interval=10, timeout=1, clock=lambda: now[0]
+    )
+    ready, checks = monitor.snapshot()
+    assert ready is False
+    assert checks["dynamodb"]["error"] == "not checked yet"
+
+    asyncio.run(monitor.run_once())
+    assert monitor.snapshot()[0] is True
+
+    now[0] += 31
+    ready, checks = monitor.snapshot()
+    assert ready is False
+    assert checks["dynamodb"]["error"] == "result is stale"
+
+
+def test_hung_probe_times_out_and_is_not_restarted():
+    release = threading.Event()
+    started = []
+
+    def hung():
+        started.append(1)
+        release.wait(5)
+
+    monitor = ReadinessMonitor({"cognito": hung}, interval=10, timeout=0.05)
+
+    async def run():
+        first = await monitor.check("cognito")
+        second = await monitor.check("cognito")
+        release.set()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.ok is False
+    assert "no answer" in first.error
+    assert second.error == "previous check still running"
+    assert len(started) == 1
+
+
+def test_probe_jwks_refreshes_only_when_old():
+    with patch("app.utils.health.public_keys_age", return_value=10.0), patch(
+        "app.utils.health.refresh_public_keys"
+    ) as refresh:
+        probe_jwks(refresh_seconds=3600)
+        refresh.assert_not_called()
+        probe_jwks(refresh_seconds=5)
+        refresh.assert_called_once_with()
+
+
+def test_probe_jwks_keeps_old_keys_when_refresh_fails():
+    with patch("app.utils.health.public_keys_age", return_value=7200.0), patch(
+        "app.utils.health.refresh_public_keys", side_effect=Exception("down")
+    ):
+        probe_jwks(refresh_seconds=3600)
+
+    with patch("app.utils.health.public_keys_age", return_value=None), patch(
+        "app.utils.health.refresh_public_keys", side_effect=Exception("down")
+    ):
+        with pytest.raises(Exception):
+            probe_jwks(refresh_seconds=3600)
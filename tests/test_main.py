@@ -0,0 +1,46 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, MagicMock, patch
+from app import config
+from app.main import app
+
+
+def test_lifespan_builds_clients_and_warms_up():
+    messages_table = MagicMock()
+    conversations_table = MagicMock()
+    cognito_client = MagicMock()
+
+    with patch("app.main.create_dynamodb_resource"), patch(
+        "app.main.create_messages_table", return_value=messages_table
+    ), patch(
+        "app.main.create_conversations_table", return_value=conversations_table
+    ), patch(
+        "app.main.create_cognito_client", return_value=cognito_client
+    ), patch(
+        "app.main.create_readiness_monitor"
+    ) as mock_create_monitor:
+        monitor = mock_create_monitor.return_value
+        monitor.run_once = AsyncMock()
+        monitor.stop = AsyncMock()
+        with TestClient(app) as client:
+            assert app.state.messages_table is messages_table
+            assert app.state.conversations_table is conversations_table
+            assert app.state.cognito_client is cognito_client
+            mock_create_monitor.assert_called_once_with(app.state)
+            monitor.run_once.assert_awaited_once_with(
+                timeout=config.WARM_UP_TIMEOUT_SECONDS
+            )
+            monitor.start.assert_called_once_with()
+            assert client.get("/health").status_code == 200
+        monitor.stop.assert_awaited_once_with()
+
+    app.state.messages_table = None
+    app.state.conversations_table = None
+    app.state.cognito_client = None
+    app.state.readiness = None
+
+
+def test_config_validate_missing_variable(monkeypatch):
+    monkeypatch.setattr(config, "DYNAMO_MESSAGES_TABLE", None)
+    with pytest.raises(EnvironmentError):
+        config.validate()
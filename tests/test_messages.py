@@ -1,8 +1,17 @@
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from app.main import app
 from app.auth import get_current_user
+from app.dependencies import (
+    get_messages_table,
+    get_conversations_table,
+    get_context_store,
+    get_user_stats_store,
+    get_event_hub,
+)
+from app.utils.context import ContextStore
+from app.utils.events import message_deleted, message_updated
 from app.models.users import User
 import uuid
 
@@ -26,21 +35,25 @@ async def mock_get_current_user():
 
 
 mock_dynamodb_table = MagicMock()
+mock_conversations_table = MagicMock()
+mock_user_stats_store = MagicMock()
+mock_event_hub = MagicMock()
 
 
 @pytest.fixture(autouse=True)
 def override_dependency():
+    context_store = ContextStore(max_turns=10, max_bytes=1024 * 1024)
     app.dependency_overrides[get_current_user] = mock_get_current_user
+    app.dependency_overrides[get_context_store] = lambda: context_store
+    app.dependency_overrides[get_user_stats_store] = lambda: mock_user_stats_store
+    app.dependency_overrides[get_messages_table] = lambda: mock_dynamodb_table
+    app.dependency_overrides[get_conversations_table] = lambda: mock_conversations_table
+    mock_event_hub.publish = AsyncMock()
+    app.dependency_overrides[get_event_hub] = lambda: mock_event_hub
     yield
     app.dependency_overrides.clear()
 
 
-@pytest.fixture(autouse=True)
-def mock_dynamodb():
-    with patch("app.routers.messages.messages_table", mock_dynamodb_table):
-        yield
-
-
 def test_list_messages():
     mock_dynamodb_table.query.return_value = {
         "Items": [
@@ -71,11 +84,42 @@ def test_list_messages():
     assert data["messages"][1]["id_message"] == "message2"
 
 
+def test_list_messages_returns_typed_items():
+    mock_dynamodb_table.query.return_value = {
+        "Items": [
+            {
+                "id_message": "message1",
+                "id_user": test_user.sub,
+                "content": "Hello!",
+                "timestamp": "2024-10-07T07:33:21.023112",
+                "is_bot": False,
+                "unexpected_attribute": "ignored",
+            },
+        ],
+    }
+
+    response = client.get("/messages/", headers={"Authorization": "Bearer valid_token"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {
+        "messages": [
+            {
+                "id_message": "message1",
+                "id_user": test_user.sub,
+                "content": "Hello!",
+                "timestamp": "2024-10-07T07:33:21.023112",
+                "is_bot": False,
+                "id_conversation": None,
+            }
+        ]
+    }
+
+
 def test_send_message():
     mock_dynamodb_table.put_item.return_value = {}
 
     with patch(
-        "app.routers.messages.generate_bot_response"
+        "app.utils.messages.generate_bot_response"
     ) as mock_generate_bot_response:
         mock_generate_bot_response.return_value = "This is a bot response."
 
@@ -92,6 +136,29 @@ def test_send_message():
         assert data["user_message"]["content"] == payload["content"]
         assert data["bot_response"]["content"] == "This is a bot response."
 
+        id_user, events = mock_event_hub.publish.await_args.args
+        assert id_user == test_user.sub
+        assert [event["type"] for event in events] == ["message.created"] * 2
+        assert events[0]["message"] == data["user_message"]
+        assert events[1]["message"] == data["bot_response"]
+
+
+def test_send_message_uses_in_memory_context():
+    mock_dynamodb_table.reset_mock()
+    mock_dynamodb_table.query.return_value = {"Items": []}
+    mock_dynamodb_table.put_item.return_value = {}
+
+    first = client.post("/messages/", json={"content": "Tell me a joke"})
+    second = client.post("/messages/", json={"content": "Another one please"})
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert (
+        second.json()["bot_response"]["content"]
+        == first.json()["bot_response"]["content"]
+    )
+    mock_dynamodb_table.query.assert_called_once()
+
 
 def test_edit_message():
     message_id = "message1"
@@ -119,6 +186,9 @@ def test_edit_message():
     data = response.json()
     assert data["id_message"] == message_id
     assert data["content"] == new_content
+    mock_event_hub.publish.assert_awaited_once_with(
+        test_user.sub, [message_updated(message_id, new_content)]
+    )
 
 
 def test_delete_message():
@@ -144,3 +214,160 @@ def test_delete_message():
     data = response.json()
     assert data["id_message"] == message_id
     assert data["status"] == "deleted"
+    mock_event_hub.publish.assert_awaited_once_with(
+        test_user.sub, [message_deleted(message_id)]
+    )
+
+
+def test_batch_delete_messages_reports_each_id():
+    mock_dynamodb_table.name = "Messages"
+    dynamo_client = mock_dynamodb_table.meta.client
+    dynamo_client.batch_get_item.side_effect = None
+    dynamo_client.batch_get_item.return_value = {
+        "Responses": {
+            "Messages": [
+                {"id_message": "m1", "id_user": test_user.sub, "is_bot": False},
+                {
+                    "id_message": "m2",
+                    "id_user": test_user.sub,
+                    "is_bot": False,
+                    "id_conversation": "conversation1",
+                },
+                {"id_message": "bot1", "id_user": test_user.sub, "is_bot": True},
+            ]
+        }
+    }
+    unprocessed = {
+        "Messages": [
+            {"DeleteRequest": {"Key": {"id_message": "m2", "id_user": test_user.sub}}}
+        ]
+    }
+    dynamo_client.batch_write_item.side_effect = [
+        {"UnprocessedItems": unprocessed},
+        {"UnprocessedItems": {}},
+    ]
+    mock_conversations_table.reset_mock()
+
+    response = client.post(
+        "/messages/batch-delete", json={"ids": ["m1", "m2", "bot1", "missing", "m1"]}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["deleted"] == 2
+    assert {result["id_message"]: result["status"] for result in data["results"]} == {
+        "m1": "deleted",
+        "m2": "deleted",
+        "bot1": "bot_message",
+        "missing": "not_found",
+    }
+    assert dynamo_client.batch_write_item.call_count == 2
+    retried = dynamo_client.batch_write_item.call_args_list[1].kwargs
+    assert retried["RequestItems"] == unprocessed
+    update = mock_conversations_table.update_item.call_args.kwargs
+    assert update["ExpressionAttributeValues"] == {":count_delta": -1}
+    mock_event_hub.publish.assert_awaited_once_with(
+        test_user.sub, [message_deleted("m1"), message_deleted("m2")]
+    )
+
+
+def test_batch_delete_messages_rejects_too_many_ids():
+    response = client.post(
+        "/messages/batch-delete", json={"ids": [f"m{i}" for i in range(101)]}
+    )
+    assert response.status_code == 400
+
+
+def test_clear_messages_skips_bot_messages():
+    mock_dynamodb_table.name = "Messages"
+    mock_dynamodb_table.query.side_effect = None
+    mock_dynamodb_table.query.return_value = {
+        "Items": [
+            {"id_message": "m1", "id_user": test_user.sub, "is_bot": False},
+            {"id_message": "bot1", "id_user": test_user.sub, "is_bot": True},
+        ]
+    }
+    dynamo_client = mock_dynamodb_table.meta.client
+    dynamo_client.batch_write_item.side_effect = None
+    dynamo_client.batch_write_item.return_value = {"UnprocessedItems": {}}
+
+    response = client.delete("/messages/")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "deleted": 1,
+        "results": [
+            {"id_message": "bot1", "status": "bot_message"},
+            {"id_message": "m1", "status": "deleted"},
+        ],
+    }
+    request = dynamo_client.batch_write_item.call_args.kwargs["RequestItems"]
+    assert request == {
+        "Messages": [
+            {"DeleteRequest": {"Key": {"id_message": "m1", "id_user": test_user.sub}}}
+        ]
+    }
+
+
+def test_clear_messages_deletes_each_page_as_it_arrives():
+    mock_dynamodb_table.name = "Messages"
+    mock_dynamodb_table.query.reset_mock()
+    mock_dynamodb_table.query.side_effect = [
+        {
+            "Items": [{"id_message": "m1", "id_user": test_user.sub, "is_bot": False}],
+            "LastEvaluatedKey": {"id_message": "m1"},
+        },
+        {"Items": [{"id_message": "m2", "id_user": test_user.sub, "is_bot": False}]},
+    ]
+    dynamo_client = mock_dynamodb_table.meta.client
+    dynamo_client.batch_write_item.reset_mock()
+    dynamo_client.batch_write_item.side_effect = None
+    dynamo_client.batch_write_item.return_value = {"UnprocessedItems": {}}
+
+    response = client.delete("/messages/")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "deleted": 2,
+        "results": [
+            {"id_message": "m1", "status": "deleted"},
+            {"id_message": "m2", "status": "deleted"},
+        ],
+    }
+    assert dynamo_client.batch_write_item.call_count == 2
+    assert mock_dynamodb_table.query.call_count == 2
+    mock_dynamodb_table.query.side_effect = None
+
+
+def test_get_message_stats():
+    mock_user_stats_store.get.return_value = {
+        "id_user": test_user.sub,
+        "user_messages": 4,
+        "bot_messages": 4,
+        "last_activity": "2024-10-07T07:35:21.023112",
+    }
+
+    response = client.get("/messages/stats")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "id_user": test_user.sub,
+        "user_messages": 4,
+        "bot_messages": 4,
+        "total_messages": 8,
+        "bot_user_ratio": 1.0,
+        "last_activity": "2024-10-07T07:35:21.023112",
+    }
+
+
+def test_send_message_records_stats():
+    mock_user_stats_store.reset_mock()
+    mock_dynamodb_table.put_item.return_value = {}
+
+    response = client.post("/messages/", json={"content": "Hello"})
+
+    assert response.status_code == 200
+    kwargs = mock_user_stats_store.record.call_args.kwargs
+    assert kwargs["user_delta"] == 1
+    assert kwargs["bot_delta"] == 1
+    assert kwargs["last_activity"] == response.json()["bot_response"]["timestamp"]
@@ -0,0 +1,76 @@
+import asyncio
+import json
+from unittest.mock import MagicMock
+from botocore.exceptions import ClientError
+from app.jobs.bulk_register import run
+from app.utils.provisioning import AdaptiveLimiter, parse_records
+
+
+def test_parse_records_csv_and_ndjson():
+    csv_records = list(
+        parse_records(["email,password", "", "a@example.com,Password1"], "csv")
+    )
+    assert csv_records == [(3, {"email": "a@example.com", "password": "Password1"})]
+
+    spaced = list(
+        parse_records(["email, password", "a@example.com, Password1 "], "csv")
+    )
+    assert spaced == [(2, {"email": "a@example.com", "password": "Password1"})]
+
+    ndjson_records = list(
+        parse_records(['{"email": "b@example.com"}', "{oops"], "ndjson")
+    )
+    assert ndjson_records[0] == (1, {"email": "b@example.com"})
+    assert isinstance(ndjson_records[1][1], ValueError)
+
+
+def test_adaptive_limiter_backs_off_and_recovers():
+    limiter = AdaptiveLimiter(max_concurrency=8)
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert limiter.limit == 2
+
+    for _ in range(2):
+        limiter.on_success()
+    assert limiter.limit == 3
+
+
+def test_cli_resumes_from_results_file(tmp_path):
+    users = tmp_path / "users.ndjson"
+    users.write_text(
+        "\n".join(
+            json.dumps({"email": email, "password": "Password123"})
+            for email in ("Done@Example.COM", "todo@example.com")
+        )
+    )
+    results = tmp_path / "results.ndjson"
+    results.write_text(
+        json.dumps({"line": 1, "email": "Done@example.com", "status": "created"}) + "\n"
+    )
+    cognito_client = MagicMock()
+
+    statuses = asyncio.run(run(cognito_client, str(users), str(results), 4))
+
+    assert statuses == {"created": 1}
+    created = cognito_client.admin_create_user.call_args.kwargs["Username"]
+    assert created == "todo@example.com"
+    lines = results.read_text().splitlines()
+    assert json.loads(lines[-1])["email"] == "todo@example.com"
+
+
+def test_cli_completes_half_created_user(tmp_path):
+    users = tmp_path / "users.csv"
+    users.write_text("email,password\nhalf@example.com,Password123\n")
+    cognito_client = MagicMock()
+    cognito_client.admin_create_user.side_effect = ClientError(
+        {"Error": {"Code": "UsernameExistsException", "Message": "Exists"}},
+        "AdminCreateUser",
+    )
+    cognito_client.admin_get_user.return_value = {"UserStatus": "FORCE_CHANGE_PASSWORD"}
+
+    statuses = asyncio.run(
+        run(cognito_client, str(users), str(tmp_path / "results.ndjson"), 2)
+    )
+
+    assert statuses == {"created": 1}
+    cognito_client.admin_set_user_password.assert_called_once()
@@ -0,0 +1,38 @@
+from unittest.mock import patch
+from app import config
+from app import serve
+
+
+def test_build_server_options_uses_config(monkeypatch):
+    monkeypatch.setattr(config, "WEB_CONCURRENCY", 4)
+    monkeypatch.setattr(config, "SERVER_BACKLOG", 1024)
+    monkeypatch.setattr(config, "SERVER_KEEP_ALIVE_SECONDS", 15)
+    monkeypatch.setattr(config, "SERVER_MAX_REQUESTS", 10000)
+    monkeypatch.setattr(config, "SERVER_GRACEFUL_SHUTDOWN_SECONDS", 20.0)
+
+    options = serve.build_server_options()
+
+    assert options["workers"] == 4
+    assert options["backlog"] == 1024
+    assert options["timeout_keep_alive"] == 15
+    assert options["limit_max_requests"] == 10000
+    assert options["timeout_graceful_shutdown"] == 20.0
+    assert options["loop"] in ("uvloop", "asyncio")
+    assert options["http"] in ("httptools", "h11")
+
+
+def test_main_preloads_and_disables_recycling_for_one_worker(monkeypatch):
+    monkeypatch.setattr(config, "WEB_CONCURRENCY", 1)
+    monkeypatch.setattr(config, "SERVER_MAX_REQUESTS", 10000)
+    monkeypatch.setattr(config, "SERVER_PRELOAD", True)
+
+    with patch("app.serve.preload") as mock_preload, patch(
+        "app.serve.uvicorn.run"
+    ) as mock_run:
+        serve.main()
+
+    mock_preload.assert_called_once()
+    args, kwargs = mock_run.call_args
+    assert args == ("app.main:app",)
+    assert kwargs["workers"] == 1
+    assert kwargs["limit_max_requests"] is None
@@ -0,0 +1,118 @@
+from unittest.mock import MagicMock
+from app.jobs.backfill_stats import aggregate, write_stats
+from app.utils.ratelimit import RateLimiter
+from app.utils.stats import UserStatsStore
+
+
+def test_record_applies_atomic_update_and_refreshes_cache():
+    table = MagicMock()
+    table.update_item.return_value = {
+        "Attributes": {"id_user": "user1", "user_messages": 3, "bot_messages": 3}
+    }
+    store = UserStatsStore(table, cache_seconds=60)
+
+    store.record("user1", user_delta=1, bot_delta=1, last_activity="2024-10-07")
+
+    update = table.update_item.call_args.kwargs
+    assert update["UpdateExpression"] == (
+        "ADD user_messages :user_delta, bot_messages :bot_delta "
+        "SET last_activity = :last_activity"
+    )
+    assert update["ReturnValues"] == "ALL_NEW"
+    assert store.get("user1")["user_messages"] == 3
+    table.get_item.assert_not_called()
+
+
+def test_get_reads_table_when_cache_is_stale():
+    now = [0.0]
+    table = MagicMock()
+    table.get_item.return_value = {"Item": {"id_user": "user1", "user_messages": 2}}
+    store = UserStatsStore(table, cache_seconds=5, clock=lambda: now[0])
+
+    assert store.get("user1")["user_messages"] == 2
+    store.get("user1")
+    now[0] = 10
+    store.get("user1")
+
+    assert table.get_item.call_count == 2
+
+
+def test_record_failure_invalidates_cache():
+    table = MagicMock()
+    table.get_item.return_value = {"Item": {"id_user": "user1"}}
+    table.update_item.side_effect = Exception("throttled")
+    store = UserStatsStore(table, cache_seconds=60)
+
+    store.get("user1")
+    store.record("user1", user_delta=-1)
+    store.get("user1")
+
+    assert table.get_item.call_count == 2
+
+
+def test_backfill_aggregates_in_one_pass():
+    messages_table = MagicMock()
+    messages_table.scan.side_effect = [
+        {
+            "Items": [
+                {"id_user": "user1", "is_bot": False, "timestamp": "2024-10-07T07:33"},
+                {"id_user": "user1", "is_bot": True, "timestamp": "2024-10-07T07:34"},
+            ],
+            "LastEvaluatedKey": {"id_message": "m2"},
+        },
+        {"Items": [{"id_user": "user2", "is_bot": False, "timestamp": "2024-10-01"}]},
+    ]
+    limiter = RateLimiter(rate=1e9, sleep=lambda seconds: None)
+
+    stats = aggregate(messages_table, 1000, limiter)
+
+    assert stats["user1"] == {
+        "id_user": "user1",
+        "user_messages": 1,
+        "bot_messages": 1,
+        "last_activity": "2024-10-07T07:34",
+    }
+    assert stats["user2"]["user_messages"] == 1
+    assert messages_table.scan.call_count == 2
+
+    stats_table = MagicMock()
+    stats_table.scan.return_value = {"Items": [{"id_user": "user1"}]}
+    write_stats(stats_table, stats, 1000, limiter)
+    batch = stats_table.batch_writer.return_value.__enter__.return_value
+    assert batch.put_item.call_count == 2
+
+
+def test_backfill_zeroes_users_without_messages():
+    limiter = RateLimiter(rate=1e9, sleep=lambda seconds: None)
+    stats = {
+        "user1": {
+            "id_user": "user1",
+            "user_messages": 1,
+            "bot_messages": 1,
+            "last_activity": "2024-10-07T07:34",
+        }
+    }
+    stats_table = MagicMock()
+    stats_table.scan.side_effect = [
+        {
+            "Items": [{"id_user": "user1", "last_activity": "2024-10-07T07:34"}],
+            "LastEvaluatedKey": {"id_user": "user1"},
+        },
+        {"Items": [{"id_user": "expired", "last_activity": "2023-01-01T00:00"}]},
+    ]
+
+    zeroed = write_stats(stats_table, stats, 1000, limiter)
+
+    assert zeroed == 1
+    batch = stats_table.batch_writer.return_value.__enter__.return_value
+    batch.put_item.assert_called_with(
+        Item={
+            "id_user": "expired",
+            "last_activity": "2023-01-01T00:00",
+            "user_messages": 0,
+            "bot_messages": 0,
+        }
+    )
+    assert stats_table.scan.call_args.kwargs["ExclusiveStartKey"] == {
+        "id_user": "user1"
+    }
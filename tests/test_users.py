@@ -1,6 +1,10 @@
+import json
+import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock
+from app import config
 from app.main import app
+from app.dependencies import get_cognito_client
 from botocore.exceptions import ClientError
 
 client = TestClient(app)
@@ -21,7 +25,14 @@ nonexistent_user_login = {"email": "nonexistent@example.com", "password": "Passw
 invalid_email_login = {"email": "invalidemail", "password": "Password123"}
 
 
-@patch("app.routers.users.cognito_client")
+@pytest.fixture
+def mock_cognito_client():
+    cognito_client = MagicMock()
+    app.dependency_overrides[get_cognito_client] = lambda: cognito_client
+    yield cognito_client
+    app.dependency_overrides.clear()
+
+
 def test_register_user_success(mock_cognito_client):
     mock_cognito_client.admin_create_user.return_value = {}
     mock_cognito_client.admin_set_user_password.return_value = {}
@@ -32,7 +43,6 @@ def test_register_user_success(mock_cognito_client):
     assert response.json() == {"message": "User created successfully"}
 
 
-@patch("app.routers.users.cognito_client")
 def test_register_user_existing_email(mock_cognito_client):
     mock_cognito_client.admin_create_user.side_effect = ClientError(
         {
@@ -60,7 +70,6 @@ def test_register_user_invalid_email():
     assert response.status_code == 422
 
 
-@patch("app.routers.users.cognito_client")
 def test_login_user_invalid_password(mock_cognito_client):
     mock_cognito_client.initiate_auth.side_effect = ClientError(
         {
@@ -77,7 +86,6 @@ def test_login_user_invalid_password(mock_cognito_client):
     assert response.json()["detail"] == "Invalid email or password"
 
 
-@patch("app.routers.users.cognito_client")
 def test_login_user_nonexistent_user(mock_cognito_client):
     mock_cognito_client.initiate_auth.side_effect = ClientError(
         {"Error": {"Code": "UserNotFoundException", "Message": "User does not exist."}},
@@ -92,3 +100,53 @@ def test_login_user_nonexistent_user(mock_cognito_client):
 def test_login_user_invalid_email():
     response = client.post("/users/login", json=invalid_email_login)
     assert response.status_code == 422
+
+
+def test_bulk_register_requires_admin_token(monkeypatch):
+    monkeypatch.setattr(config, "ADMIN_API_TOKEN", "admin-secret")
+    response = client.post(
+        "/users/bulk-register",
+        content="email,password\n",
+        headers={"Content-Type": "text/csv", "X-Admin-Token": "wrong"},
+    )
+    assert response.status_code == 403
+
+
+def test_bulk_register_streams_results(monkeypatch, mock_cognito_client):
+    monkeypatch.setattr(config, "ADMIN_API_TOKEN", "admin-secret")
+    monkeypatch.setattr("app.utils.provisioning.asyncio.sleep", AsyncMock())
+    mock_cognito_client.admin_create_user.side_effect = [
+        ClientError(
+            {"Error": {"Code": "TooManyRequestsException", "Message": "Slow down"}},
+            "AdminCreateUser",
+        ),
+        {},
+        ClientError(
+            {"Error": {"Code": "UsernameExistsException", "Message": "Exists"}},
+            "AdminCreateUser",
+        ),
+    ]
+    mock_cognito_client.admin_get_user.return_value = {"UserStatus": "CONFIRMED"}
+    monkeypatch.setattr(config, "BULK_REGISTER_CONCURRENCY", 1)
+
+    body = (
+        "email,password\n"
+        "new@example.com,Password123\n"
+        "existing@example.com,Password123\n"
+        "bad@example.com,short\n"
+    )
+    response = client.post(
+        "/users/bulk-register",
+        content=body,
+        headers={"Content-Type": "text/csv", "X-Admin-Token": "admin-secret"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    results = {
+        result["line"]: result for result in map(json.loads, response.text.splitlines())
+    }
+    assert results[2] == {"line": 2, "email": "new@example.com", "status": "created"}
+    assert results[3]["status"] == "exists"
+    assert results[4]["status"] == "invalid"
+    assert "short" not in response.text